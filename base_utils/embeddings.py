@@ -0,0 +1,219 @@
+"""
+Shared embedding helpers for the Chroma-backed knowledge bases.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List
+
+import numpy as np
+
+# Sentence-transformer model shared by the Twitter and podcast knowledge bases
+EMBEDDING_MODEL_NAME = 'all-mpnet-base-v2'
+
+# Inference backend for the embedding model: "torch" (default), "onnx" or
+# "openvino". The exported backends are noticeably faster on CPU.
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+
+# Optional model file for the onnx/openvino backends, e.g. an int8-quantized
+# export such as "onnx/model_qint8_avx512.onnx" (see sentence_transformers'
+# export_dynamic_quantized_onnx_model). Empty means the default fp32 export.
+EMBEDDING_MODEL_FILE = os.getenv("EMBEDDING_MODEL_FILE", "") if EMBEDDING_BACKEND != "torch" else ""
+
+# Cache key namespace; non-default backends (and quantized files) get their own
+# cached vectors since their outputs differ slightly from the torch model's
+EMBEDDING_CACHE_KEY = (
+    EMBEDDING_MODEL_NAME if EMBEDDING_BACKEND == "torch"
+    else f"{EMBEDDING_MODEL_NAME}@{EMBEDDING_BACKEND}"
+)
+if EMBEDDING_MODEL_FILE:
+    EMBEDDING_CACHE_KEY = f"{EMBEDDING_CACHE_KEY}:{EMBEDDING_MODEL_FILE}"
+
+# Persistent Chroma store shared by the knowledge bases
+CHROMA_PATH = "./chroma_db"
+
+# Embeddings are cached next to the Chroma data so they survive restarts
+EMBEDDING_CACHE_PATH = os.path.join("chroma_db", "embedding_cache.db")
+SQLITE_MAX_PARAMS = 500  # Stay well below SQLite's bound-parameter limit
+ENCODE_BATCH_SIZE = 64  # Texts per forward pass when embedding cache misses
+
+# Vectors are stored as float16, which halves the cache size; cosine
+# similarity is insensitive to the rounding
+CACHE_DTYPE = "float16"
+
+# Recently used vectors kept in memory in front of the SQLite cache, so repeated
+# knowledge-base queries skip both the encoder and the database
+MEMORY_CACHE_SIZE = 1024
+
+# HNSW settings for new Chroma collections. The knowledge bases report
+# `1 - distance` as relevance, which is only meaningful for cosine distance
+# (Chroma defaults to squared L2). Only applied when a collection is created.
+COLLECTION_METADATA = {
+    "hnsw:space": "cosine",
+    "hnsw:construction_ef": 200,
+    "hnsw:search_ef": 100,
+    "hnsw:M": 32,
+}
+
+
+# One client per path, shared by every knowledge base; the lock keeps knowledge
+# bases that are initialized in parallel threads from creating two for one path
+_chroma_clients = {}
+_chroma_clients_lock = threading.Lock()
+
+
+def get_chroma_client(path: str = CHROMA_PATH):
+    """Return the process-wide Chroma client for path, creating it on first use."""
+    with _chroma_clients_lock:
+        client = _chroma_clients.get(path)
+        if client is None:
+            import chromadb
+
+            client = _chroma_clients[path] = chromadb.PersistentClient(path=path)
+        return client
+
+
+# Loaded once and shared by every knowledge base; the lock keeps knowledge bases
+# that are initialized in parallel threads from loading it twice
+_embedding_model = None
+_embedding_model_lock = threading.Lock()
+
+
+def load_embedding_model():
+    """Return the shared knowledge-base embedding model, loading it on first use."""
+    global _embedding_model
+    with _embedding_model_lock:
+        if _embedding_model is None:
+            _embedding_model = _load_embedding_model()
+        return _embedding_model
+
+
+def _load_embedding_model():
+    """Load the knowledge-base embedding model on the configured backend."""
+    from sentence_transformers import SentenceTransformer
+
+    if EMBEDDING_BACKEND == "torch":
+        model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+        # Half precision halves weight/activation bandwidth on GPU; the vectors
+        # are stored as float16 anyway, so cached and fresh lookups still agree
+        if model.device.type == "cuda":
+            model.half()
+        return model
+    model_kwargs = {"file_name": EMBEDDING_MODEL_FILE} if EMBEDDING_MODEL_FILE else None
+    return SentenceTransformer(EMBEDDING_MODEL_NAME, backend=EMBEDDING_BACKEND, model_kwargs=model_kwargs)
+
+
+class CachedEmbeddingFunction:
+    """Chroma embedding function that reuses vectors for previously seen text.
+
+    Vectors are keyed by a hash of the model name and the text, so re-adding
+    the same tweets or transcript segments (e.g. after clearing a collection)
+    only runs the encoder on content it has never embedded before.
+    """
+
+    def __init__(self, model, model_name: str, cache_path: str = EMBEDDING_CACHE_PATH):
+        self.model = model
+        self.model_name = model_name
+        self.cache_path = cache_path
+        self._memory = OrderedDict()
+
+        cache_dir = os.path.dirname(cache_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        # One connection for the lifetime of the function. Chroma may call it
+        # from worker threads (asyncio.to_thread), so access is serialized
+        self._conn = sqlite3.connect(self.cache_path, check_same_thread=False)
+        self._db_lock = threading.Lock()
+
+        with self._transaction() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    hash TEXT PRIMARY KEY,
+                    vec BLOB,
+                    dtype TEXT NOT NULL DEFAULT 'float32'
+                )
+            ''')
+            # Caches written before vectors were stored as float16 have no dtype column
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(embeddings)')}
+            if 'dtype' not in columns:
+                conn.execute("ALTER TABLE embeddings ADD COLUMN dtype TEXT NOT NULL DEFAULT 'float32'")
+
+    @contextmanager
+    def _transaction(self):
+        """Use the shared connection, committing on success and rolling back on error."""
+        with self._db_lock, self._conn:
+            yield self._conn
+
+    def close(self):
+        """Close the cache database connection."""
+        with self._db_lock:
+            self._conn.close()
+
+    def _hash(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def _load_cached(self, hashes: List[str]) -> Dict[str, np.ndarray]:
+        """Fetch cached vectors for the given hashes in as few queries as possible."""
+        cached = {}
+        with self._transaction() as conn:
+            for start in range(0, len(hashes), SQLITE_MAX_PARAMS):
+                batch = hashes[start:start + SQLITE_MAX_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                cursor = conn.execute(
+                    f'SELECT hash, vec, dtype FROM embeddings WHERE hash IN ({placeholders})',
+                    batch
+                )
+                for key, blob, dtype in cursor.fetchall():
+                    cached[key] = np.frombuffer(blob, dtype=dtype).astype(np.float32)
+        return cached
+
+    def _remember(self, vectors: Dict[str, np.ndarray]):
+        """Add vectors to the in-memory LRU, evicting the least recently used."""
+        for key, vec in vectors.items():
+            self._memory[key] = vec
+            self._memory.move_to_end(key)
+        while len(self._memory) > MEMORY_CACHE_SIZE:
+            self._memory.popitem(last=False)
+
+    def warm(self, texts: List[str]):
+        """Embed known texts ahead of time in one batch so later lookups are memory hits."""
+        if texts:
+            self(list(texts))
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        hashes = [self._hash(text) for text in input]
+        unique_hashes = list(dict.fromkeys(hashes))
+
+        cached = {key: self._memory[key] for key in unique_hashes if key in self._memory}
+        if len(cached) < len(unique_hashes):
+            cached.update(self._load_cached([key for key in unique_hashes if key not in cached]))
+
+        # Encode each missing text once, even if it appears several times in the batch
+        missing = {}
+        for key, text in zip(hashes, input):
+            if key not in cached:
+                missing.setdefault(key, text)
+
+        if missing:
+            vectors = self.model.encode(list(missing.values()), batch_size=ENCODE_BATCH_SIZE)
+            # Convert the whole batch at once rather than vector by vector; the
+            # float32 copy carries the stored precision so fresh and cached lookups agree
+            stored = np.asarray(vectors, dtype=CACHE_DTYPE)
+            restored = stored.astype(np.float32)
+            rows = []
+            for i, key in enumerate(missing.keys()):
+                cached[key] = restored[i]
+                rows.append((key, stored[i].tobytes(), CACHE_DTYPE))
+
+            with self._transaction() as conn:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO embeddings (hash, vec, dtype) VALUES (?, ?, ?)',
+                    rows
+                )
+
+        self._remember(cached)
+        return [cached[key].tolist() for key in hashes]
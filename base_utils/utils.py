@@ -1,5 +1,8 @@
+import atexit
+import inspect
+import queue
+import sys
 import threading
-import time
 
 # ANSI color codes
 class Colors:
@@ -12,17 +15,57 @@ class Colors:
     ENDC = "\033[0m"
     BOLD = "\033[1m"
 
+# Set by start_background_output(); console writes are queued here when enabled
+_output_queue = None
+
+def _drain_output(output_queue):
+    """Write queued console output from a background thread."""
+    while True:
+        text = output_queue.get()
+        try:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+        except Exception:
+            pass  # e.g. a closed pipe; keep draining so flush_output() can't hang
+        finally:
+            output_queue.task_done()
+
+def start_background_output():
+    """Queue console output for a daemon writer thread instead of printing inline.
+
+    Used by long-running loops so a slow terminal or pipe can't stall the code
+    consuming agent chunks. Output order is preserved, and anything still queued
+    is written at interpreter exit.
+    """
+    global _output_queue
+    if _output_queue is None:
+        output_queue = queue.Queue()
+        threading.Thread(target=_drain_output, args=(output_queue,), daemon=True).start()
+        _output_queue = output_queue
+        atexit.register(flush_output)
+
+def flush_output():
+    """Block until all queued console output has been written."""
+    if _output_queue is not None:
+        _output_queue.join()
+
+def _write(text, end="\n"):
+    if _output_queue is not None:
+        _output_queue.put(text + end)
+    else:
+        print(text, end=end, flush=True)
+
 def print_ai(text):
     """Print AI responses in green."""
-    print(f"{Colors.GREEN}{text}{Colors.ENDC}")
+    _write(f"{Colors.GREEN}{text}{Colors.ENDC}")
 
 def print_system(text):
     """Print system messages in yellow."""
-    print(f"{Colors.YELLOW}{text}{Colors.ENDC}")
+    _write(f"{Colors.YELLOW}{text}{Colors.ENDC}")
 
 def print_error(text):
     """Print error messages in red."""
-    print(f"{Colors.RED}{text}{Colors.ENDC}")
+    _write(f"{Colors.RED}{text}{Colors.ENDC}")
 
 class ProgressIndicator:
     def __init__(self):
@@ -30,53 +73,88 @@ class ProgressIndicator:
         self.idx = 0
         self._stop_event = threading.Event()
         self._thread = None
+        self._running = False
         
     def _animate(self):
         """Animation loop running in separate thread."""
         while not self._stop_event.is_set():
-            print(f"\r{Colors.YELLOW}Processing {self.animation[self.idx]}{Colors.ENDC}", end="", flush=True)
+            _write(f"\r{Colors.YELLOW}Processing {self.animation[self.idx]}{Colors.ENDC}", end="")
             self.idx = (self.idx + 1) % len(self.animation)
-            time.sleep(0.2)  # Update every 0.2 seconds
+            # Update every 0.2 seconds; waiting on the event lets stop() return at once
+            self._stop_event.wait(0.2)
             
     def start(self):
-        """Start the progress animation in a separate thread."""
+        """Start the progress animation in a separate thread (no-op if already running)."""
+        if self._running:
+            return
+        self._running = True
         self._stop_event.clear()
         self._thread = threading.Thread(target=self._animate)
         self._thread.daemon = True
         self._thread.start()
         
     def stop(self):
-        """Stop the progress animation."""
-        if self._thread and self._thread.is_alive():
-            self._stop_event.set()
-            self._thread.join()
-            print("\r" + " " * 50 + "\r", end="", flush=True)  # Clear the line
-
-def run_with_progress(func, *args, **kwargs):
-    """Run a function while showing a progress indicator."""
+        """Stop the progress animation (no-op if not running)."""
+        if not self._running:
+            return
+        self._running = False
+        self._stop_event.set()
+        self._thread.join()
+        _write("\r" + " " * 50 + "\r", end="")  # Clear the line
+
+async def run_with_progress(func, *args, **kwargs):
+    """Run a streaming function while showing a progress indicator between outputs.
+
+    Accepts sync or async generator functions. Chunks are yielded as soon as they
+    arrive and the caller does the printing, so this is an async generator either way.
+    """
     progress = ProgressIndicator()
     
     try:
-        progress.start()
+        # Handle both async and sync generators; the kind is checked once up front
         generator = func(*args, **kwargs)
-        chunks = []
         
-        for chunk in generator:
-            progress.stop()
-            
-            if "agent" in chunk:
-                print(f"\n{Colors.GREEN}{chunk['agent']['messages'][0].content}{Colors.ENDC}")
-            elif "tools" in chunk:
-                print(f"\n{Colors.YELLOW}{chunk['tools']['messages'][0].content}{Colors.ENDC}")
-            print(f"\n{Colors.YELLOW}-------------------{Colors.ENDC}")
+        if inspect.isasyncgen(generator):
+            async for chunk in generator:
+                progress.stop()  # Stop spinner before output
+                yield chunk     # Yield the chunk immediately
+                progress.start()  # Restart spinner while waiting for next chunk
+        else:  # Handle synchronous generators
+            for chunk in generator:
+                progress.stop()
+                yield chunk
+                progress.start()
             
-            chunks.append(chunk)
-            progress.start()
-        
-        return chunks
     finally:
         progress.stop()
 
+# Color formats for the different output modes of format_ai_message_content
+MESSAGE_COLORS = {
+    "ansi": {
+        "green": Colors.GREEN,
+        "magenta": Colors.MAGENTA,
+        "end": Colors.ENDC
+    },
+    "markdown": {
+        "green": '<span style="color: #2ecc71">',  # Bright green
+        "magenta": '<span style="color: #e056fd">',  # Bright magenta
+        "end": '</span>'
+    }
+}
+
+# XML-like response tags rewritten as markdown headings in markdown mode
+MARKDOWN_TAG_REPLACEMENTS = (
+    ("<response_planning>", "**Planning:**\n"),
+    ("</response_planning>", "\n"),
+    ("<response>", "**Response:**\n"),
+    ("</response>", ""),
+)
+
+def _tags_to_markdown(text):
+    for tag, replacement in MARKDOWN_TAG_REPLACEMENTS:
+        text = text.replace(tag, replacement)
+    return text
+
 def format_ai_message_content(content, additional_kwargs=None, format_mode="ansi"):
     """Format AI message content based on its type and format mode.
     
@@ -87,22 +165,8 @@ def format_ai_message_content(content, additional_kwargs=None, format_mode="ansi
     """
     formatted_parts = []
     
-    # Define color formats for different modes
-    colors = {
-        "ansi": {
-            "green": Colors.GREEN,
-            "magenta": Colors.MAGENTA,
-            "end": Colors.ENDC
-        },
-        "markdown": {
-            "green": '<span style="color: #2ecc71">',  # Bright green
-            "magenta": '<span style="color: #e056fd">',  # Bright magenta
-            "end": '</span>'
-        }
-    }
-    
     # Get the appropriate color set
-    color_set = colors[format_mode]
+    color_set = MESSAGE_COLORS[format_mode]
     
     # Handle text content
     if isinstance(content, list):
@@ -114,14 +178,7 @@ def format_ai_message_content(content, additional_kwargs=None, format_mode="ansi
         if text_parts:
             if format_mode == "markdown":
                 # Process each text part individually since text_parts is a list
-                processed_parts = []
-                for part in text_parts:
-                    processed = part.replace("<response_planning>", "**Planning:**\n")
-                    processed = processed.replace("</response_planning>", "\n") 
-                    processed = processed.replace("<response>", "**Response:**\n")
-                    processed = processed.replace("</response>", "")
-                    processed_parts.append(processed)
-                formatted_parts.extend(processed_parts)
+                formatted_parts.extend(_tags_to_markdown(part) for part in text_parts)
             else:
                 formatted_parts.extend(text_parts)
         
@@ -136,10 +193,7 @@ def format_ai_message_content(content, additional_kwargs=None, format_mode="ansi
         if content:
             # Clean up XML-like tags if in markdown mode
             if format_mode == "markdown":
-                content = content.replace("<response_planning>", "**Planning:**\n")
-                content = content.replace("</response_planning>", "\n")
-                content = content.replace("<response>", "**Response:**\n")
-                content = content.replace("</response>", "")
+                content = _tags_to_markdown(content)
             formatted_parts.append(f"{color_set['green']}{content}{color_set['end']}")
             
         if additional_kwargs and 'tool_calls' in additional_kwargs:
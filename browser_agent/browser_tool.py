@@ -1,7 +1,6 @@
-from typing import Optional, Any, Literal
+from typing import Optional, Literal
 from langchain_core.tools import BaseTool
 from browser_use import Agent, Browser, BrowserConfig
-from langchain_openai import ChatOpenAI
 from langchain_anthropic import ChatAnthropic
 from pydantic import Field
 
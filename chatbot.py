@@ -2,19 +2,31 @@ import os
 import sys
 import uuid
 from dotenv import load_dotenv
-from datetime import datetime
 import json
-from typing import List, Dict, Any, Optional
+import orjson
+from typing import List, Dict, Any, Optional, Tuple
 import random
+import re
 import asyncio
+import signal
+import threading
+import queue
+import time
 import warnings
+from functools import lru_cache
+from dataclasses import dataclass
+from collections import OrderedDict, deque
 
 # Import prompts
 from base_utils.prompts import (
     PODCAST_QUERY_PROMPT,
     PODCAST_TOPICS,
     PODCAST_ASPECTS,
-    BASIC_QUERY_TEMPLATES
+    BASIC_QUERY_TEMPLATES,
+    KOL_XML_TEMPLATE,
+    MENTION_XML_TEMPLATE,
+    RECENT_TWEET_XML_TEMPLATE,
+    TWITTER_AUTOMATION_PROMPT
 )
 from base_utils.tooldescriptions import (
     TWITTER_REPLY_CHECK_DESCRIPTION,
@@ -35,49 +47,27 @@ warnings.filterwarnings("ignore", message="FP16 is not supported on CPU; using F
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(current_dir)
 
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_anthropic import ChatAnthropic
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.prebuilt import create_react_agent
-from langchain_community.tools import DuckDuckGoSearchRun
-from langchain_community.agent_toolkits.openapi.toolkit import RequestsToolkit
-from langchain_community.utilities.requests import TextRequestsWrapper
 from langchain.tools import Tool
 from langchain_core.runnables import RunnableConfig
-from browser_agent import BrowserToolkit
-
-# Import Coinbase AgentKit related modules
-from coinbase_agentkit import (
-    AgentKit,
-    AgentKitConfig,
-    CdpWalletProvider,
-    CdpWalletProviderConfig,
-    cdp_api_action_provider,
-    cdp_wallet_action_provider,
-    erc20_action_provider,
-    pyth_action_provider,
-    wallet_action_provider,
-    weth_action_provider,
-    twitter_action_provider,
-)
-from coinbase_agentkit_langchain import get_langchain_tools
 
-# Import Hyperbolic related modules
-from hyperbolic_langchain.agent_toolkits import HyperbolicToolkit
-from hyperbolic_langchain.utils import HyperbolicAgentkitWrapper
+# Toolkit integrations (Coinbase AgentKit, Hyperbolic, browser, writing, GitHub,
+# web search/requests) and the knowledge bases are imported where they are
+# used, so importing this module (e.g. from the voice server or gradio UI)
+# doesn't load CDP, torch, chromadb, etc. for tools that are disabled.
 
 # Import Twitter-related modules
 from twitter_agent.custom_twitter_actions import (
-    TwitterClient,
+    twitter_client,
     create_delete_tweet_tool,
     create_get_user_id_tool,
     create_get_user_tweets_tool,
     create_retweet_tool
 )
 from twitter_agent.twitter_state import TwitterState, MENTION_CHECK_INTERVAL, MAX_MENTIONS_PER_INTERVAL
-from twitter_agent.twitter_knowledge_base import TweetKnowledgeBase, update_knowledge_base
-
-from github_agent.custom_github_actions import GitHubAPIWrapper, create_evaluate_profiles_tool
 
 # Import local modules
 from base_utils.utils import (
@@ -85,14 +75,29 @@ from base_utils.utils import (
     print_ai, 
     print_system, 
     print_error, 
-    ProgressIndicator, 
-    run_with_progress, 
-    format_ai_message_content
+    run_with_progress,
+    format_ai_message_content,
+    start_background_output,
+    flush_output
 )
-from podcast_agent.podcast_knowledge_base import PodcastKnowledgeBase
 
-# Add the import for WritingTool near the other imports at the top of the file
-from writing_agent.writing_tool import WritingTool
+@lru_cache(maxsize=None)
+def get_llm(model: str = "claude-3-5-sonnet-20241022", max_tokens: Optional[int] = None) -> ChatAnthropic:
+    """Return a shared ChatAnthropic instance per model so its HTTP connection pool is reused."""
+    if max_tokens is None:
+        return ChatAnthropic(model=model)
+    return ChatAnthropic(model=model, max_tokens=max_tokens)
+
+# Generated podcast queries are asked to be 10-15 words; cap decoding so a chatty
+# reply can't run to the default 1024 tokens
+PODCAST_QUERY_MAX_TOKENS = 60
+
+# Topic/template sampling for podcast queries; set PODCAST_QUERY_SEED to make
+# the rotation reproducible (e.g. when comparing prompt variants)
+_QUERY_RNG = random.Random(os.getenv("PODCAST_QUERY_SEED"))
+
+# Quotes and "Query:" labels the model sometimes wraps around its answer
+_QUERY_CLEANUP_RE = re.compile(r'"|Query:')
 
 async def generate_llm_podcast_query(llm: ChatAnthropic = None) -> str:
     """
@@ -100,17 +105,18 @@ async def generate_llm_podcast_query(llm: ChatAnthropic = None) -> str:
     Uses various prompting techniques to create unique and insightful queries.
     
     Args:
-        llm: ChatAnthropic instance. If None, creates a new one.
+        llm: ChatAnthropic instance. If None, uses the shared Haiku instance.
         
     Returns:
         str: A generated query string
     """
-    llm = ChatAnthropic(model="claude-3-5-haiku-20241022")
+    if llm is None:
+        llm = get_llm("claude-3-5-haiku-20241022", max_tokens=PODCAST_QUERY_MAX_TOKENS)
     
     # Format the prompt with random selections
     prompt = PODCAST_QUERY_PROMPT.format(
-        topics=random.sample(PODCAST_TOPICS, 3),
-        aspects=random.sample(PODCAST_ASPECTS, 2)
+        topics=_QUERY_RNG.sample(PODCAST_TOPICS, 3),
+        aspects=_QUERY_RNG.sample(PODCAST_ASPECTS, 2)
     )
     
     # Get response from LLM
@@ -118,37 +124,59 @@ async def generate_llm_podcast_query(llm: ChatAnthropic = None) -> str:
     query = response.content.strip()
     
     # Clean up the query if needed
-    query = query.replace('"', '').replace('Query:', '').strip()
+    query = _QUERY_CLEANUP_RE.sub('', query).strip()
+    if not query:
+        # Let generate_podcast_query fall back to a template instead of reusing a blank query
+        raise ValueError("LLM returned an empty podcast query")
     
     return query
 
 # Legacy function for fallback
 def generate_basic_podcast_query() -> str:
     """Legacy function that returns a basic template query as fallback."""
-    return random.choice(BASIC_QUERY_TEMPLATES)
+    return _QUERY_RNG.choice(BASIC_QUERY_TEMPLATES)
+
+# Seconds a generated podcast query stays fresh; cycles within this window reuse it
+PODCAST_QUERY_TTL = 5 * 60
+# Seconds before a mention check that the automation loop starts generating its query
+PODCAST_QUERY_PREFETCH_LEAD = 30
+_last_podcast_query = {"text": None, "at": 0.0}
 
 async def generate_podcast_query() -> str:
     """
     Main query generation function that attempts to use LLM-based generation
-    with fallback to basic templates.
+    with fallback to basic templates. A generated query is reused for
+    PODCAST_QUERY_TTL seconds before a new one is requested.
     
     Returns:
         str: A query string for the podcast knowledge base
     """
+    if _last_podcast_query["text"] and time.monotonic() - _last_podcast_query["at"] < PODCAST_QUERY_TTL:
+        return _last_podcast_query["text"]
     try:
-        # Create LLM instance
-        llm = ChatAnthropic(model="claude-3-5-sonnet-20241022")
-        # Get LLM-generated query
-        query = await generate_llm_podcast_query(llm)
+        # Get LLM-generated query (a short query, so the default small model is enough)
+        query = await generate_llm_podcast_query()
+        _last_podcast_query.update(text=query, at=time.monotonic())
         return query
     except Exception as e:
         print_error(f"Error generating LLM query: {e}")
         # Fallback to basic template
         return generate_basic_podcast_query()
 
+async def fresh_podcast_query(prefetch: Optional[asyncio.Task] = None) -> str:
+    """Return a podcast query that is fresh now, after any prefetch has finished.
+
+    Freshness is checked here, where the query is used, so a prefetched query
+    that has aged past PODCAST_QUERY_TTL is regenerated rather than reused.
+    """
+    if prefetch is not None:
+        await prefetch
+    return await generate_podcast_query()
+
 # Constants
 ALLOW_DANGEROUS_REQUEST = True  # Set to False in production for security
 wallet_data_file = "wallet_data.txt"
+MAX_POST_EXAMPLES = 10  # Post examples sampled into the personality prompt; bounds prompt size
 
 
 # Create TwitterState instance
@@ -179,6 +207,12 @@ add_reposted_tool = Tool(
     description=TWITTER_ADD_REPOSTED_DESCRIPTION
 )
 
+@lru_cache(maxsize=8)
+def _load_character_file(path: str, mtime: float) -> Dict[str, Any]:
+    """Parse a character file once per (path, mtime); an edited file is re-read."""
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
+
 def loadCharacters(charactersArg: str) -> List[Dict[str, Any]]:
     """Load character files and return their configurations."""
     characterPaths = charactersArg.split(",") if charactersArg else []
@@ -199,12 +233,15 @@ def loadCharacters(charactersArg: str) -> List[Dict[str, Any]]:
             ]
 
             for path in searchPaths:
-                if os.path.exists(path):
-                    with open(path, 'r', encoding='utf-8') as f:
-                        character = json.load(f)
-                        loadedCharacters.append(character)
-                        print(f"Successfully loaded character from: {path}")
-                        break
+                # One stat both finds the file and gives the mtime for the parse cache
+                try:
+                    mtime = os.stat(path).st_mtime
+                except OSError:
+                    continue
+                character = _load_character_file(path, mtime)
+                loadedCharacters.append(character)
+                print(f"Successfully loaded character from: {path}")
+                break
             else:
                 raise FileNotFoundError(f"Could not find character file: {characterPath}")
 
@@ -214,84 +251,177 @@ def loadCharacters(charactersArg: str) -> List[Dict[str, Any]]:
 
     return loadedCharacters
 
-def process_character_config(character: Dict[str, Any]) -> str:
-    """Process character configuration into agent personality."""
-    # Extract core character elements
-    bio = "\n".join([f"- {item}" for item in character.get('bio', [])])
-    lore = "\n".join([f"- {item}" for item in character.get('lore', [])])
-    knowledge = "\n".join([f"- {item}" for item in character.get('knowledge', [])])
-
-    topics = "\n".join([f"- {item}" for item in character.get('topics', [])])
-
-    kol_list = "\n".join([f"- {item}" for item in character.get('kol_list', [])])
-    
-    # Format style guidelines
-    style_all = "\n".join([f"- {item}" for item in character.get('style', {}).get('all', [])])
-
-    adjectives = "\n".join([f"- {item}" for item in character.get('adjectives', [])])
-    # style_chat = "\n".join([f"- {item}" for item in character.get('style', {}).get('chat', [])])
-    # style_post = "\n".join([f"- {item}" for item in character.get('style', {}).get('post', [])])
-
-    # Select and format post examples
-    all_posts = character.get('postExamples', [])
-    selected_posts = random.sample(all_posts, min(10, len(all_posts)))
-    post_examples = "\n".join([
-        f"Example {i+1}: {post}"
-        for i, post in enumerate(selected_posts)
-        if isinstance(post, str) and post.strip()
-    ])
-
-    personality = f"""
-    Here are examples of your previous posts:
-    <post_examples>
-    {post_examples}
-    </post_examples>
-
+def _bulletize(items) -> str:
+    """Render items as a "- item" markdown list, one per line."""
+    return "- " + "\n- ".join(map(str, items)) if items else ""
+
+# Rendered static personality sections, keyed by id() of the character dict.
+# _load_character_file returns the same dict for an unchanged file, so this is
+# a cheap lookup; entries hold the dict itself so its id can't be reused while
+# cached. Sized like the character file cache.
+_CHARACTER_SECTIONS_CACHE: "OrderedDict[int, Tuple[Dict[str, Any], Dict[str, Any]]]" = OrderedDict()
+CHARACTER_SECTIONS_CACHE_SIZE = 8
+
+def _character_sections(character: Dict[str, Any]) -> Dict[str, Any]:
+    """Render the static bullet-list sections of a character config once per loaded config."""
+    cache_key = id(character)
+    cached = _CHARACTER_SECTIONS_CACHE.get(cache_key)
+    if cached is not None:
+        _CHARACTER_SECTIONS_CACHE.move_to_end(cache_key)
+        return cached[1]
+    sections = {
+        "bio": _bulletize(character.get('bio', [])),
+        "lore": _bulletize(character.get('lore', [])),
+        "knowledge": _bulletize(character.get('knowledge', [])),
+        "topics": _bulletize(character.get('topics', [])),
+        "kol_list": _bulletize(character.get('kol_list', [])),
+        # Format style guidelines
+        "style_all": _bulletize(character.get('style', {}).get('all', [])),
+        "adjectives": _bulletize(character.get('adjectives', [])),
+        # Usable post examples, filtered once so each prompt build only samples
+        "posts": tuple(
+            post for post in character.get('postExamples', [])
+            if isinstance(post, str) and post.strip()
+        ),
+    }
+    _CHARACTER_SECTIONS_CACHE[cache_key] = (character, sections)
+    if len(_CHARACTER_SECTIONS_CACHE) > CHARACTER_SECTIONS_CACHE_SIZE:
+        _CHARACTER_SECTIONS_CACHE.popitem(last=False)
+    return sections
+
+def split_character_config(character: Dict[str, Any]) -> Tuple[str, str]:
+    """Process character configuration into a (static_prefix, post_examples_suffix) pair.
+
+    The prefix depends only on the character file and is rendered once; the suffix
+    holds the randomly sampled post examples. Keeping the varying part last leaves a
+    stable prompt prefix for provider-side prompt caching.
+    """
+    # Extract core character elements (cached, only the post examples vary per call)
+    sections = _character_sections(character)
+    static_prefix = sections.get("static_prefix")
+    if static_prefix is None:
+        # style_chat = "\n".join([f"- {item}" for item in character.get('style', {}).get('chat', [])])
+        # style_post = "\n".join([f"- {item}" for item in character.get('style', {}).get('post', [])])
+        static_prefix = f"""
     You are an AI character designed to interact on social media with this configuration:
 
     <character_bio>
-    {bio}
+    {sections["bio"]}
     </character_bio>
 
     <character_lore>
-    {lore}
+    {sections["lore"]}
     </character_lore>
 
     <character_knowledge>
-    {knowledge}
+    {sections["knowledge"]}
     </character_knowledge>
 
     <character_adjectives>
-    {adjectives}
+    {sections["adjectives"]}
     </character_adjectives>
 
     <kol_list>
-    {kol_list}
+    {sections["kol_list"]}
     </kol_list>
 
     <style_guidelines>
-    {style_all}
+    {sections["style_all"]}
     </style_guidelines>
 
     <topics>
-    {topics}
+    {sections["topics"]}
     </topics>
+    """
+        sections["static_prefix"] = static_prefix
+
+    # Select and format post examples
+    all_posts = sections["posts"]
+    selected_posts = random.sample(all_posts, min(MAX_POST_EXAMPLES, len(all_posts)))
+    post_examples = "\n".join(
+        f"Example {i+1}: {post}"
+        for i, post in enumerate(selected_posts)
+    )
+
+    post_examples_suffix = f"""
+    Here are examples of your previous posts:
+    <post_examples>
+    {post_examples}
+    </post_examples>
     """
 
-    return personality
+    return static_prefix, post_examples_suffix
+
+def process_character_config(character: Dict[str, Any]) -> str:
+    """Process character configuration into agent personality."""
+    return "".join(split_character_config(character))
+
+def env_flag(name: str, default: bool) -> bool:
+    """Read a "true"/"false" feature flag, ignoring case and surrounding whitespace."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() == "true"
+
+@dataclass(frozen=True)
+class AgentFlags:
+    """Tool feature flags, read from the environment once at import."""
+    use_browser_tools: bool
+    use_writing_agent: bool
+    use_twitter_knowledge_base: bool
+    use_tweet_reply_tracking: bool
+    use_tweet_repost_tracking: bool
+    use_twitter_core: bool
+    use_tweet_delete: bool
+    use_user_id_lookup: bool
+    use_user_tweets_lookup: bool
+    use_retweet: bool
+    use_podcast_knowledge_base: bool
+    use_coinbase_tools: bool
+    use_hyperbolic_tools: bool
+    use_web_search: bool
+    use_request_tools: bool
+    allow_dangerous_request: bool
+    use_github_tools: bool
+
+    @classmethod
+    def from_env(cls) -> "AgentFlags":
+        return cls(
+            use_browser_tools=env_flag("USE_BROWSER_TOOLS", True),
+            use_writing_agent=env_flag("USE_WRITING_AGENT", True),
+            use_twitter_knowledge_base=env_flag("USE_TWITTER_KNOWLEDGE_BASE", True),
+            use_tweet_reply_tracking=env_flag("USE_TWEET_REPLY_TRACKING", True),
+            use_tweet_repost_tracking=env_flag("USE_TWEET_REPOST_TRACKING", True),
+            use_twitter_core=env_flag("USE_TWITTER_CORE", True),
+            use_tweet_delete=env_flag("USE_TWEET_DELETE", True),
+            use_user_id_lookup=env_flag("USE_USER_ID_LOOKUP", True),
+            use_user_tweets_lookup=env_flag("USE_USER_TWEETS_LOOKUP", True),
+            use_retweet=env_flag("USE_RETWEET", True),
+            use_podcast_knowledge_base=env_flag("USE_PODCAST_KNOWLEDGE_BASE", True),
+            use_coinbase_tools=env_flag("USE_COINBASE_TOOLS", True),
+            use_hyperbolic_tools=env_flag("USE_HYPERBOLIC_TOOLS", False),
+            use_web_search=env_flag("USE_WEB_SEARCH", False),
+            use_request_tools=env_flag("USE_REQUEST_TOOLS", False),
+            allow_dangerous_request=env_flag("ALLOW_DANGEROUS_REQUEST", True),
+            use_github_tools=env_flag("USE_GITHUB_TOOLS", True),
+        )
+
+AGENT_FLAGS = AgentFlags.from_env()
 
 def create_agent_tools(llm, knowledge_base, podcast_knowledge_base, agent_kit, config):
     """Create and return a list of tools for the agent to use."""
     tools = []
 
     # Add browser toolkit if enabled
-    if os.getenv("USE_BROWSER_TOOLS", "true").lower() == "true":
+    if AGENT_FLAGS.use_browser_tools:
+        from browser_agent import BrowserToolkit
         browser_toolkit = BrowserToolkit.from_llm(llm)
         tools.extend(browser_toolkit.get_tools())
 
     # Add Writing Agent Tools if enabled
-    if os.getenv("USE_WRITING_AGENT", "true").lower() == "true":
+    if AGENT_FLAGS.use_writing_agent:
         print_system("Adding writing agent tools...")
+        from writing_agent.writing_tool import WritingTool
         # Create output directory for generated articles
         output_dir = os.path.join(os.getcwd(), "generated_articles")
         os.makedirs(output_dir, exist_ok=True)
@@ -300,109 +430,319 @@ def create_agent_tools(llm, knowledge_base, podcast_knowledge_base, agent_kit, c
         print_system(f"Added writing agent tool (output directory: {output_dir})")
 
     # Add Twitter Knowledge Base Tools if enabled
-    if os.getenv("USE_TWITTER_KNOWLEDGE_BASE", "true").lower() == "true" and knowledge_base is not None:
+    if AGENT_FLAGS.use_twitter_knowledge_base and knowledge_base is not None:
         tools.append(Tool(
             name="query_twitter_knowledge_base",
             description=TWITTER_KNOWLEDGE_BASE_DESCRIPTION,
-            func=lambda query: knowledge_base.query_knowledge_base(query)
+            func=knowledge_base.query_knowledge_base
         ))
 
-    # Add Twitter State Management Tools if enabled
-    if os.getenv("USE_TWEET_REPLY_TRACKING", "true").lower() == "true":
-        twitter_state = TwitterState()
-        tools.extend([
-            Tool(
-                name="has_replied_to",
-                func=twitter_state.has_replied_to,
-                description=TWITTER_REPLY_CHECK_DESCRIPTION
-            ),
-            Tool(
-                name="add_replied_to",
-                func=twitter_state.add_replied_tweet,
-                description=TWITTER_ADD_REPLIED_DESCRIPTION
-            )
-        ])
-
-    if os.getenv("USE_TWEET_REPOST_TRACKING", "true").lower() == "true":
-        if not 'twitter_state' in locals():
-            twitter_state = TwitterState()
-        tools.extend([
-            Tool(
-                name="has_reposted",
-                func=twitter_state.has_reposted,
-                description=TWITTER_REPOST_CHECK_DESCRIPTION
-            ),
-            Tool(
-                name="add_reposted",
-                func=twitter_state.add_reposted_tweet,
-                description=TWITTER_ADD_REPOSTED_DESCRIPTION
-            )
-        ])
+    # Add Twitter State Management Tools if enabled. These share the module-level
+    # twitter_state with the automation loop so both see the same replied/reposted IDs
+    if AGENT_FLAGS.use_tweet_reply_tracking:
+        tools.extend([check_replied_tool, add_replied_tool])
+
+    if AGENT_FLAGS.use_tweet_repost_tracking:
+        tools.extend([check_reposted_tool, add_reposted_tool])
 
-    # Initialize Twitter client and add custom Twitter Tools if enabled
-    if os.getenv("USE_TWITTER_CORE", "true").lower() == "true":
+    # Add custom Twitter Tools if enabled (they use the shared module-level client)
+    if AGENT_FLAGS.use_twitter_core:
         print_system("Adding custom Twitter tools...")
-        twitter_client = TwitterClient()
         
-        if os.getenv("USE_TWEET_DELETE", "true").lower() == "true":
+        if AGENT_FLAGS.use_tweet_delete:
             tools.append(create_delete_tweet_tool())
             
-        if os.getenv("USE_USER_ID_LOOKUP", "true").lower() == "true":
+        if AGENT_FLAGS.use_user_id_lookup:
             tools.append(create_get_user_id_tool())
             
-        if os.getenv("USE_USER_TWEETS_LOOKUP", "true").lower() == "true":
+        if AGENT_FLAGS.use_user_tweets_lookup:
             tools.append(create_get_user_tweets_tool())
             
-        if os.getenv("USE_RETWEET", "true").lower() == "true":
+        if AGENT_FLAGS.use_retweet:
             tools.append(create_retweet_tool())
             
         print_system("Added custom Twitter tools")
 
     # Add Podcast Knowledge Base Tools if enabled
-    if os.getenv("USE_PODCAST_KNOWLEDGE_BASE", "true").lower() == "true" and podcast_knowledge_base is not None:
+    if AGENT_FLAGS.use_podcast_knowledge_base and podcast_knowledge_base is not None:
         tools.append(Tool(
             name="query_podcast_knowledge_base",
-            func=lambda query: podcast_knowledge_base.format_query_results(
-                podcast_knowledge_base.query_knowledge_base(query)
-            ),
+            func=podcast_knowledge_base.query_and_format,
             description=PODCAST_KNOWLEDGE_BASE_DESCRIPTION
         ))
     
 
     # Add Coinbase AgentKit tools (blockchain/wallet/twitter operations)
-    if os.getenv("USE_COINBASE_TOOLS", "true").lower() == "true":
+    if AGENT_FLAGS.use_coinbase_tools:
         print_system("Adding Coinbase AgentKit tools...")
+        from coinbase_agentkit_langchain import get_langchain_tools
         coinbase_tools = get_langchain_tools(agent_kit)
         tools.extend(coinbase_tools)
         print_system(f"Added {len(coinbase_tools)} Coinbase tools")
 
     # Add Hyperbolic tools
-    if os.getenv("USE_HYPERBOLIC_TOOLS", "false").lower() == "true":
+    if AGENT_FLAGS.use_hyperbolic_tools:
+        from hyperbolic_langchain.agent_toolkits import HyperbolicToolkit
+        from hyperbolic_langchain.utils import HyperbolicAgentkitWrapper
         hyperbolic_agentkit = HyperbolicAgentkitWrapper()
         hyperbolic_toolkit = HyperbolicToolkit.from_hyperbolic_agentkit_wrapper(hyperbolic_agentkit)
         tools.extend(hyperbolic_toolkit.get_tools())
 
     # Add web search if enabled
-    if os.getenv("USE_WEB_SEARCH", "false").lower() == "true":
+    if AGENT_FLAGS.use_web_search:
+        from langchain_community.tools import DuckDuckGoSearchRun
         tools.append(DuckDuckGoSearchRun(
             name="web_search",
             description=WEB_SEARCH_DESCRIPTION
         ))
 
-    if os.getenv("USE_REQUEST_TOOLS", "false").lower() == "true":
+    if AGENT_FLAGS.use_request_tools:
+        from langchain_community.agent_toolkits.openapi.toolkit import RequestsToolkit
+        from langchain_community.utilities.requests import TextRequestsWrapper
         toolkit = RequestsToolkit(
             requests_wrapper=TextRequestsWrapper(headers={}),
-            allow_dangerous_requests=os.getenv("ALLOW_DANGEROUS_REQUEST", "true").lower() == "true",
+            allow_dangerous_requests=AGENT_FLAGS.allow_dangerous_request,
         )
         tools.extend(toolkit.get_tools())
 
     return tools
 
+def initialize_agent_kit():
+    """Configure the CDP wallet provider and Coinbase AgentKit.
+
+    Blocking (network and wallet file I/O), so initialize_agent runs it in a thread.
+    """
+    print_system("Initializing Coinbase AgentKit...")
+    from coinbase_agentkit import (
+        AgentKit,
+        AgentKitConfig,
+        CdpWalletProvider,
+        CdpWalletProviderConfig,
+        cdp_api_action_provider,
+        cdp_wallet_action_provider,
+        erc20_action_provider,
+        pyth_action_provider,
+        wallet_action_provider,
+        weth_action_provider,
+        twitter_action_provider,
+    )
+    wallet_data = None
+    if os.path.exists(wallet_data_file):
+        with open(wallet_data_file) as f:
+            wallet_data = f.read()
+
+    # Configure wallet provider with all available action providers
+    wallet_provider = CdpWalletProvider(CdpWalletProviderConfig(
+        api_key_name=os.getenv("CDP_API_KEY_NAME"),
+        api_key_private=os.getenv("CDP_API_KEY_PRIVATE"),
+        network_id=os.getenv("CDP_NETWORK_ID", "base-mainnet"),
+        wallet_data=wallet_data if wallet_data else None
+    ))
+
+    # Initialize AgentKit with all action providers
+    agent_kit = AgentKit(AgentKitConfig(
+        wallet_provider=wallet_provider,
+        action_providers=[
+            cdp_api_action_provider(),
+            cdp_wallet_action_provider(),
+            erc20_action_provider(),
+            pyth_action_provider(),
+            wallet_action_provider(),
+            weth_action_provider(),
+            twitter_action_provider(),
+        ]
+    ))
+    
+    # Save wallet data
+    if not wallet_data:
+        wallet_data = orjson.dumps(wallet_provider.export_wallet().to_dict()).decode()
+        with open(wallet_data_file, "w") as f:
+            f.write(wallet_data)
+
+    return agent_kit
+
+def ask_yes_no(prompt: str) -> bool:
+    """Prompt until the user answers 'y' or 'n'."""
+    while True:
+        choice = input(prompt).lower().strip()
+        if choice in ['y', 'n']:
+            return choice == 'y'
+        print("Invalid choice. Please enter 'y' or 'n'.")
+
+class _ConsoleReader:
+    """Single daemon thread that reads stdin lines on behalf of ainput().
+
+    Each line goes to the oldest prompt still waiting for one. A line read for a
+    prompt that was cancelled in the meantime is kept for the next call instead
+    of being swallowed by a stray thread. All state except the request queue is
+    only touched from the event loop.
+    """
+
+    def __init__(self):
+        self._requests = queue.Queue()
+        self._thread = None
+        self._waiters = deque()
+        self._unclaimed = deque()  # (line, error) pairs nobody was waiting for
+        self._reading = False
+
+    async def readline(self, prompt: str) -> str:
+        if self._unclaimed:
+            line, error = self._unclaimed.popleft()
+            if error is not None:
+                raise error
+            return line
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self._request(prompt)
+        return await future
+
+    def _request(self, prompt):
+        if self._reading:
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        self._reading = True
+        self._requests.put((prompt, asyncio.get_running_loop()))
+
+    def _run(self):
+        while True:
+            prompt, loop = self._requests.get()
+            try:
+                line, error = input(prompt), None
+            except Exception as e:
+                line, error = None, e
+            loop.call_soon_threadsafe(self._deliver, line, error)
+
+    def _deliver(self, line, error):
+        self._reading = False
+        while self._waiters:
+            future = self._waiters.popleft()
+            if future.done():  # the waiting task was cancelled
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(line)
+            break
+        else:
+            self._unclaimed.append((line, error))
+        # Keep reading while prompts are still waiting
+        if any(not future.done() for future in self._waiters):
+            self._request("")
+
+_console_reader = _ConsoleReader()
+
+async def ainput(prompt: str = "") -> str:
+    """input() that doesn't block the event loop while waiting for the user.
+
+    The read happens on a daemon thread rather than the default executor, so
+    Ctrl+C can still exit the process while a prompt is open.
+    """
+    return await _console_reader.readline(prompt)
+
+async def init_twitter_knowledge_base(config, clear: bool, update: bool):
+    """Build the Twitter knowledge base, optionally clearing it and refreshing it with KOL tweets."""
+    knowledge_base = None
+    try:
+        from twitter_agent.twitter_knowledge_base import TweetKnowledgeBase, update_knowledge_base
+        # Loading the embedding model is blocking, so keep it off the event loop
+        knowledge_base = await asyncio.to_thread(TweetKnowledgeBase)
+        stats = knowledge_base.get_collection_stats()
+        print_system(f"Initial Twitter knowledge base stats: {stats}")
+
+        if clear:
+            knowledge_base.clear_collection()
+            print_system("Knowledge base cleared")
+
+        if update:
+            print_system("\n=== Starting Twitter Knowledge Base Update ===")
+            
+            # Debug the character config
+            print_system("Character config structure:")
+            print_system(f"Config keys: {list(config.keys())}")
+            print_system(f"Character config keys: {list(config['character'].keys())}")
+            
+            # Get and validate KOL list
+            print_system("\n=== Extracting KOL List ===")
+            kol_list = config['character'].get('kol_list', [])
+            
+            print_system(f"Raw KOL list type: {type(kol_list)}")
+            print_system(f"Raw KOL list length: {len(kol_list)}")
+            
+            if len(kol_list) > 0:
+                print_system("First KOL entry:")
+                print_system(json.dumps(kol_list[0], indent=2))
+            
+            # Validate the KOL list structure
+            if not isinstance(kol_list, list):
+                print_error("KOL list in character config is not a list")
+                return knowledge_base
+            
+            print_system(f"Found {len(kol_list)} KOLs in character config")
+            
+            try:
+                print_system("\n=== Updating Knowledge Base ===")
+                await update_knowledge_base(
+                    twitter_client=twitter_client,
+                    knowledge_base=knowledge_base,
+                    kol_list=kol_list
+                )
+                stats = knowledge_base.get_collection_stats()
+                print_system(f"Updated knowledge base stats: {stats}")
+            except Exception as e:
+                print_error(f"Error updating knowledge base: {str(e)}")
+                print_error("Debug information:")
+                print_error(f"KOL list type: {type(kol_list)}")
+                print_error(f"KOL list length: {len(kol_list)}")
+                if len(kol_list) > 0:
+                    print_error(f"First two KOL entries:")
+                    print_error(json.dumps(kol_list[:2], indent=2))
+                import traceback
+                print_error(f"Full error traceback:\n{traceback.format_exc()}")
+    except Exception as e:
+        print_error(f"Error initializing Twitter knowledge base: {e}")
+    return knowledge_base
+
+def init_podcast_knowledge_base():
+    """Build the podcast knowledge base and index new or changed transcripts.
+
+    Blocking (model load, embedding), so initialize_agent runs it in a thread.
+    """
+    podcast_knowledge_base = None
+    try:
+        from podcast_agent.podcast_knowledge_base import PodcastKnowledgeBase
+        podcast_knowledge_base = PodcastKnowledgeBase()
+        print_system("Podcast knowledge base initialized successfully")
+
+        # The fallback query templates are fixed, so embed them up front
+        podcast_knowledge_base.warm_queries(BASIC_QUERY_TEMPLATES)
+        
+        # Get current stats before processing
+        stats = podcast_knowledge_base.get_collection_stats()
+        print_system(f"Current podcast knowledge base stats: {stats}")
+        
+        print_system("Checking for new podcast transcripts...")
+        podcast_knowledge_base.process_all_json_files()
+        
+        # Get updated stats
+        new_stats = podcast_knowledge_base.get_collection_stats()
+        print_system(f"Updated podcast knowledge base stats: {new_stats}")
+        
+        if new_stats["count"] > stats["count"]:
+            print_system(f"Added {new_stats['count'] - stats['count']} new segments to the knowledge base")
+        else:
+            print_system("No new segments were added to the knowledge base")
+            
+    except Exception as e:
+        print_error(f"Error initializing Podcast knowledge base: {e}")
+    return podcast_knowledge_base
+
 async def initialize_agent():
     """Initialize the agent with tools and configuration."""
     try:
         print_system("Initializing LLM...")
-        llm = ChatAnthropic(model="claude-3-5-sonnet-20241022")
+        llm = get_llm()
 
         print_system("Loading character configuration...")
         try:
@@ -413,7 +753,7 @@ async def initialize_agent():
             raise
 
         print_system("Processing character configuration...")
-        personality = process_character_config(character)
+        static_personality, post_examples = split_character_config(character)
 
         # Create config first before using 
         checkpoint_id = str(uuid.uuid4())
@@ -438,169 +778,44 @@ async def initialize_agent():
             }
         }
 
-        print_system("Initializing knowledge bases...")
-        knowledge_base = None
-        podcast_knowledge_base = None
-
-        # Configure Coinbase AgentKit first
-        print_system("Initializing Coinbase AgentKit...")
-        wallet_data = None
-        if os.path.exists(wallet_data_file):
-            with open(wallet_data_file) as f:
-                wallet_data = f.read()
-
-        # Configure wallet provider with all available action providers
-        wallet_provider = CdpWalletProvider(CdpWalletProviderConfig(
-            api_key_name=os.getenv("CDP_API_KEY_NAME"),
-            api_key_private=os.getenv("CDP_API_KEY_PRIVATE"),
-            network_id=os.getenv("CDP_NETWORK_ID", "base-mainnet"),
-            wallet_data=wallet_data if wallet_data else None
-        ))
-
-        # Initialize AgentKit with all action providers
-        agent_kit = AgentKit(AgentKitConfig(
-            wallet_provider=wallet_provider,
-            action_providers=[
-                cdp_api_action_provider(),
-                cdp_wallet_action_provider(),
-                erc20_action_provider(),
-                pyth_action_provider(),
-                wallet_action_provider(),
-                weth_action_provider(),
-                twitter_action_provider(),
-            ]
-        ))
-        
-        # Save wallet data
-        if not wallet_data:
-            wallet_data = json.dumps(wallet_provider.export_wallet().to_dict())
-            with open(wallet_data_file, "w") as f:
-                f.write(wallet_data)
+        # Set up Coinbase AgentKit in a worker thread while the knowledge bases
+        # are set up below; it is only needed once the tools are created
+        agent_kit_task = asyncio.create_task(asyncio.to_thread(initialize_agent_kit))
 
-        # Twitter Knowledge Base initialization
-        while True:
-            init_twitter_kb = input("\nDo you want to initialize the Twitter knowledge base? (y/n): ").lower().strip()
-            if init_twitter_kb in ['y', 'n']:
-                break
-            print("Invalid choice. Please enter 'y' or 'n'.")
+        # Ask every knowledge base question up front so the builds can run concurrently
+        init_twitter_kb = ask_yes_no("\nDo you want to initialize the Twitter knowledge base? (y/n): ")
+        clear_twitter_kb = update_twitter_kb = False
+        if init_twitter_kb:
+            clear_twitter_kb = ask_yes_no("\nDo you want to clear the existing Twitter knowledge base? (y/n): ")
+            update_twitter_kb = ask_yes_no("\nDo you want to update the Twitter knowledge base with KOL tweets? (y/n): ")
+        init_podcast_kb = ask_yes_no("\nDo you want to initialize the Podcast knowledge base? (y/n): ")
 
-        if init_twitter_kb == 'y':
-            try:
-                knowledge_base = TweetKnowledgeBase()
-                stats = knowledge_base.get_collection_stats()
-                print_system(f"Initial Twitter knowledge base stats: {stats}")
-                
-                # Initialize Twitter client here, before we need it
-                print_system("\n=== Initializing Twitter Client ===")
-                twitter_client = TwitterClient()
-                print_system("Twitter client initialized successfully")
-                
-                while True:
-                    clear_choice = input("\nDo you want to clear the existing Twitter knowledge base? (y/n): ").lower().strip()
-                    if clear_choice in ['y', 'n']:
-                        break
-                    print("Invalid choice. Please enter 'y' or 'n'.")
-
-                if clear_choice == 'y':
-                    knowledge_base.clear_collection()
-                    print_system("Knowledge base cleared")
-
-                while True:
-                    update_choice = input("\nDo you want to update the Twitter knowledge base with KOL tweets? (y/n): ").lower().strip()
-                    if update_choice in ['y', 'n']:
-                        break
-                    print("Invalid choice. Please enter 'y' or 'n'.")
-
-                if update_choice == 'y':
-                    print_system("\n=== Starting Twitter Knowledge Base Update ===")
-                    
-                    # Debug the character config
-                    print_system("Character config structure:")
-                    print_system(f"Config keys: {list(config.keys())}")
-                    print_system(f"Character config keys: {list(config['character'].keys())}")
-                    
-                    # Get and validate KOL list
-                    print_system("\n=== Extracting KOL List ===")
-                    kol_list = config['character'].get('kol_list', [])
-                    
-                    print_system(f"Raw KOL list type: {type(kol_list)}")
-                    print_system(f"Raw KOL list length: {len(kol_list)}")
-                    
-                    if len(kol_list) > 0:
-                        print_system("First KOL entry:")
-                        print_system(json.dumps(kol_list[0], indent=2))
-                    
-                    # Validate the KOL list structure
-                    if not isinstance(kol_list, list):
-                        print_error("KOL list in character config is not a list")
-                        return
-                    
-                    print_system(f"Found {len(kol_list)} KOLs in character config")
-                    
-                    try:
-                        print_system("\n=== Updating Knowledge Base ===")
-                        await update_knowledge_base(
-                            twitter_client=twitter_client,
-                            knowledge_base=knowledge_base,
-                            kol_list=kol_list
-                        )
-                        stats = knowledge_base.get_collection_stats()
-                        print_system(f"Updated knowledge base stats: {stats}")
-                    except Exception as e:
-                        print_error(f"Error updating knowledge base: {str(e)}")
-                        print_error("Debug information:")
-                        print_error(f"KOL list type: {type(kol_list)}")
-                        print_error(f"KOL list length: {len(kol_list)}")
-                        if len(kol_list) > 0:
-                            print_error(f"First two KOL entries:")
-                            print_error(json.dumps(kol_list[:2], indent=2))
-                        import traceback
-                        print_error(f"Full error traceback:\n{traceback.format_exc()}")
-            except Exception as e:
-                print_error(f"Error initializing Twitter knowledge base: {e}")
+        print_system("Initializing knowledge bases...")
+        twitter_kb_task = podcast_kb_task = None
+        if init_twitter_kb:
+            twitter_kb_task = asyncio.create_task(
+                init_twitter_knowledge_base(config, clear_twitter_kb, update_twitter_kb)
+            )
+        if init_podcast_kb:
+            podcast_kb_task = asyncio.create_task(asyncio.to_thread(init_podcast_knowledge_base))
 
-        # Podcast Knowledge Base initialization
-        while True:
-            init_podcast_kb = input("\nDo you want to initialize the Podcast knowledge base? (y/n): ").lower().strip()
-            if init_podcast_kb in ['y', 'n']:
-                break
-            print("Invalid choice. Please enter 'y' or 'n'.")
+        knowledge_base = await twitter_kb_task if twitter_kb_task else None
+        podcast_knowledge_base = await podcast_kb_task if podcast_kb_task else None
 
-        if init_podcast_kb == 'y':
-            try:
-                podcast_knowledge_base = PodcastKnowledgeBase()
-                print_system("Podcast knowledge base initialized successfully")
-                
-                # Get current stats before processing
-                stats = podcast_knowledge_base.get_collection_stats()
-                print_system(f"Current podcast knowledge base stats: {stats}")
-                
-                print_system("Checking for new podcast transcripts...")
-                podcast_knowledge_base.process_all_json_files()
-                
-                # Get updated stats
-                new_stats = podcast_knowledge_base.get_collection_stats()
-                print_system(f"Updated podcast knowledge base stats: {new_stats}")
-                
-                if new_stats["count"] > stats["count"]:
-                    print_system(f"Added {new_stats['count'] - stats['count']} new segments to the knowledge base")
-                else:
-                    print_system("No new segments were added to the knowledge base")
-                    
-            except Exception as e:
-                print_error(f"Error initializing Podcast knowledge base: {e}")
+        agent_kit = await agent_kit_task
 
         # Create tools using the helper function
         tools = create_agent_tools(llm, knowledge_base, podcast_knowledge_base, agent_kit, config)
 
         # Add GitHub profile evaluation tool
-        if os.getenv("USE_GITHUB_TOOLS", "true").lower() == "true":
+        if AGENT_FLAGS.use_github_tools:
             try:
                 github_token = os.getenv("GITHUB_TOKEN")
                 if not github_token:
                     raise ValueError("GitHub token not found. Please set the GITHUB_TOKEN environment variable.")
                 else:
                     print_system("Initializing GitHub API wrapper...")
+                    from github_agent.custom_github_actions import GitHubAPIWrapper, create_evaluate_profiles_tool
                     github_wrapper = GitHubAPIWrapper(github_token)
                     print_system("Creating GitHub profile evaluation tool...")
                     github_tool = create_evaluate_profiles_tool(github_wrapper)
@@ -610,16 +825,16 @@ async def initialize_agent():
                 print_error(f"Error initializing GitHub tools: {str(e)}")
                 print_error("GitHub tools will not be available")
 
-        # Create the runnable config with increased recursion limit
+        # Create the runnable config with increased recursion limit; built once here
+        # and shared by every turn of whichever mode runs
         runnable_config = RunnableConfig(
-        recursion_limit=200,
+            recursion_limit=200,
             configurable={
-                "thread_id": f"{character['name']} Agent",
-                "character": character["name"],
-                "recursion_limit": 100,
-                "langgraph_checkpoint_id": config["configurable"]["langgraph_checkpoint_id"],
+                "thread_id": config["configurable"]["thread_id"],
+                "langgraph_checkpoint_ns": "chat_mode",
+                "langgraph_checkpoint_id": config["configurable"]["langgraph_checkpoint_id"]
             }
-    )
+        )
 
         for tool in tools:
             print_system(tool.name)
@@ -631,15 +846,41 @@ async def initialize_agent():
             llm,
             tools=tools,
             checkpointer=memory,
-            state_modifier=personality,
+            # Mark the static personality as cacheable so Anthropic reuses the tools +
+            # personality prefix across turns (and restarts) instead of re-processing it;
+            # the sampled post examples follow the cache breakpoint
+            state_modifier=SystemMessage(content=[
+                {
+                    "type": "text",
+                    "text": static_personality,
+                    "cache_control": {"type": "ephemeral"},
+                },
+                {"type": "text", "text": post_examples},
+            ]),
         ), config, runnable_config
 
     except Exception as e:
         print_error(f"Failed to initialize agent: {e}")
         raise
 
+# Accepted values for AGENT_MODE / the first command line argument
+AGENT_MODES = {
+    "1": "chat",
+    "chat": "chat",
+    "2": "twitter_automation",
+    "twitter_automation": "twitter_automation",
+}
+
 def choose_mode():
     """Choose whether to run in autonomous or chat mode."""
+    # Scripted launches can pick the mode up front and skip the prompt
+    preset_mode = os.getenv("AGENT_MODE") or (sys.argv[1] if len(sys.argv) > 1 else None)
+    if preset_mode:
+        mode = AGENT_MODES.get(preset_mode.lower().strip())
+        if mode:
+            return mode
+        print_error(f"Unknown mode '{preset_mode}', falling back to interactive selection.")
+
     while True:
         print("\nAvailable modes:")
         print("1. Interactive chat mode")
@@ -652,27 +893,16 @@ def choose_mode():
             return "twitter_automation"
         print("Invalid choice. Please try again.")
 
-async def run_with_progress(func, *args, **kwargs):
-    """Run a function while showing a progress indicator between outputs."""
-    progress = ProgressIndicator()
-    
-    try:
-        # Handle both async and sync generators
-        generator = func(*args, **kwargs)
-        
-        if hasattr(generator, '__aiter__'):  # Check if it's an async generator
-            async for chunk in generator:
-                progress.stop()  # Stop spinner before output
-                yield chunk     # Yield the chunk immediately
-                progress.start()  # Restart spinner while waiting for next chunk
-        else:  # Handle synchronous generators
-            for chunk in generator:
-                progress.stop()
-                yield chunk
-                progress.start()
-            
-    finally:
-        progress.stop()
+# (second, "HH:MM:SS") of the last formatted clock time
+_clock_time_cache = (None, "")
+
+def clock_time() -> str:
+    """Current local time as HH:MM:SS, formatted at most once per second."""
+    global _clock_time_cache
+    second = int(time.time())
+    if _clock_time_cache[0] != second:
+        _clock_time_cache = (second, time.strftime('%H:%M:%S', time.localtime(second)))
+    return _clock_time_cache[1]
 
 async def run_chat_mode(agent_executor, config, runnable_config):
     """Run the agent interactively based on user input."""
@@ -681,20 +911,10 @@ async def run_chat_mode(agent_executor, config, runnable_config):
     print_system("  exit     - Exit the chat")
     print_system("  status   - Check if agent is responsive")
     
-    # Create the runnable config with required keys
-    runnable_config = RunnableConfig(
-        recursion_limit=200,
-        configurable={
-            "thread_id": config["configurable"]["thread_id"],
-            "langgraph_checkpoint_ns": "chat_mode",
-            "langgraph_checkpoint_id": config["configurable"]["langgraph_checkpoint_id"]
-        }
-    )
-    
     while True:
         try:
             prompt = f"{Colors.BLUE}{Colors.BOLD}User: {Colors.ENDC}"
-            user_input = input(prompt)
+            user_input = await ainput(prompt)
             
             if not user_input:
                 continue
@@ -705,7 +925,7 @@ async def run_chat_mode(agent_executor, config, runnable_config):
                 print_system("Agent is responsive and ready for commands.")
                 continue
             
-            print_system(f"\nStarted at: {datetime.now().strftime('%H:%M:%S')}")
+            print_system(f"\nStarted at: {clock_time()}")
             
             async for chunk in run_with_progress(
                 agent_executor.astream,
@@ -719,246 +939,154 @@ async def run_chat_mode(agent_executor, config, runnable_config):
                     print_system(chunk["tools"]["messages"][0].content)
                 print_system("-------------------")
                 
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            # Under asyncio.run, Ctrl+C reaches this task as a cancellation
             print_system("\nExiting chat mode...")
             break
         except Exception as e:
             print_error(f"Error: {str(e)}")
 
+# Accounts whose recent tweets are fetched as context for each automation cycle
+CONTEXT_ACCOUNT_IDS = ("1172866088222244866", "1046811588752285699", "2680433033")
+CONTEXT_TWEETS_PER_ACCOUNT = 10
+# Recent tweets fetched for each selected KOL, so the agent can pick one to reply to
+KOL_TWEETS_PER_CYCLE = 10
+
+def _tweets_xml(tweets, empty):
+    """Render tweets with RECENT_TWEET_XML_TEMPLATE, or `empty` if there are none."""
+    return "\n".join(
+        RECENT_TWEET_XML_TEMPLATE.format(
+            tweet_id=tweet.id, author_id=tweet.author_id, created_at=tweet.created_at, text=tweet.text
+        )
+        for tweet in tweets
+    ) or empty
+
 async def run_twitter_automation(agent_executor, config, runnable_config):
     """Run the agent autonomously with specified intervals."""
+    # Keep terminal writes from blocking the chunk-processing loop
+    start_background_output()
     print_system(f"Starting autonomous mode as {config['character']['name']}...")
     twitter_state.load()
+
+    # `kill -USR1 <pid>` runs the next mention check right away (POSIX only)
+    if hasattr(signal, "SIGUSR1"):
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, twitter_state.wake)
+        except (NotImplementedError, RuntimeError):
+            pass
     
-    # Reset last_check_time on startup to ensure immediate first run
-    twitter_state.last_check_time = None
-    twitter_state.save()
-    
-    # Create the runnable config with required keys
-    runnable_config = RunnableConfig(
-        recursion_limit=200,
-        configurable={
-            "thread_id": config["configurable"]["thread_id"],
-            "langgraph_checkpoint_ns": "chat_mode",
-            "langgraph_checkpoint_id": config["configurable"]["langgraph_checkpoint_id"]
-        }
-    )
-    
+    # Monotonic deadline for the next mention check (immune to wall-clock changes);
+    # the first check runs immediately
+    next_check_at = time.monotonic()
+    # Podcast query for the next cycle, generated in the background shortly
+    # before the check so it is still fresh when used
+    next_podcast_query = None
+
     while True:
         try:
             # Check mention timing - only wait if we've checked too recently
-            if not twitter_state.can_check_mentions():
-                wait_time = MENTION_CHECK_INTERVAL - (datetime.now() - twitter_state.last_check_time).total_seconds()
-                if wait_time > 0:
-                    print_system(f"Waiting {int(wait_time)} seconds before next mention check...")
-                    await asyncio.sleep(wait_time)
-                    continue
+            wait_time = next_check_at - time.monotonic()
+            if wait_time > 0:
+                if next_podcast_query is None and wait_time <= PODCAST_QUERY_PREFETCH_LEAD:
+                    next_podcast_query = asyncio.create_task(generate_podcast_query())
+                # Wake up once PODCAST_QUERY_PREFETCH_LEAD before the check to start the prefetch
+                step = wait_time if next_podcast_query else wait_time - PODCAST_QUERY_PREFETCH_LEAD
+                print_system(f"Waiting {int(wait_time)} seconds before next mention check...")
+                if await twitter_state.wait_for_wake(step):
+                    print_system("Woken up early, checking mentions now...")
+                    next_check_at = time.monotonic()
+                continue
 
-            # Update last_check_time at the start of each check
-            twitter_state.last_check_time = datetime.now()
-            twitter_state.save()
+            cycle_started_at = time.monotonic()
 
             # Select unique KOLs for interaction using random.sample
             NUM_KOLS = 1  # Define constant for number of KOLs to interact with
-            selected_kols = random.sample(config['character']['kol_list'], NUM_KOLS)
+            kol_list = config['character']['kol_list']
+            # random.sample raises on a short list, which would fail every cycle
+            selected_kols = random.sample(kol_list, min(NUM_KOLS, len(kol_list)))
 
             # Log selected KOLs
             for i, kol in enumerate(selected_kols, 1):
                 print_system(f"Selected KOL {i}: {kol['username']}")
             
-            # Create KOL XML structure for the prompt
-            kol_xml = "\n".join([
-                f"""<kol_{i+1}>
-                <username>{kol['username']}</username>
-                <user_id>{kol['user_id']}</user_id>
-                </kol_{i+1}>""" 
-                for i, kol in enumerate(selected_kols)
-            ])
-            
-            thought = f"""
-            You are an AI-powered Twitter bot acting as a marketer for The Rollup Podcast (@therollupco). Your primary functions are to create engaging original tweets, respond to mentions, and interact with key opinion leaders (KOLs) in the blockchain and cryptocurrency industry. 
-            Your goal is to promote the podcast and drive engagement while maintaining a consistent, friendly, and knowledgeable persona.
-
-            Here's the essential information for your operation:
-
-            <kol_list>
-            {kol_xml}
-            </kol_list>
-
-            <account_info>
-            {config['character']['accountid']}
-            </account_info>
-
-            <twitter_settings>
-            <mention_check_interval>{MENTION_CHECK_INTERVAL}</mention_check_interval>
-            <last_mention_id>{twitter_state.last_mention_id}</last_mention_id>
-            <current_time>{datetime.now().strftime('%H:%M:%S')}</current_time>
-            </twitter_settings>
-
-            For each task, read the entire task instructions before taking action. Wrap your reasoning inside <reasoning> tags before taking action.
-
-            Task 1: Query podcast knowledge base and recent tweets
-
-            First, gather context from recent tweets using the get_user_tweets() for each ofthese accounts:
-            Account 1: 1172866088222244866
-            Account 2: 1046811588752285699  
-            Account 3: 2680433033
-
-            Then query the podcast knowledge base:
-
-            <podcast_query>
-            {await generate_podcast_query()}
-            </podcast_query>
-
-            <reasoning>
-            1. Analyze all available context:
-            - Review all recent tweets retrieved from the accounts
-            - Analyze the podcast knowledge base query results
-            - Identify common themes and topics across both sources
-            - Note key insights that could inform an engaging tweet
-
-            2. Synthesize information:
-            - Find connections between recent tweets and podcast content
-            - Identify trending topics or discussions
-            - Look for opportunities to add unique value or insights
-            - Consider how to build on existing conversations
-
-            3. Brainstorm tweet ideas:
-            Tweet Guidelines:
-            - Ideal length: Less than 70 characters
-            - Maximum length: 280 characters
-            - Emoji usage: Do not use emojis
-            - Content references: Use evergreen language when referencing podcast content
-                - DO: "We explored this topic in our podcast"
-                - DO: "Check out our podcast episode about [topic]"
-                - DO: "We discussed this in depth on @therollupco"
-                - DON'T: "In our latest episode..."
-                - DON'T: "Just released..."
-                - DON'T: "Our newest episode..."
-            - Generate at least three distinct tweet ideas that combine insights from both sources, and follow the tweet guidelines
-            - For each idea, write out the full tweet text
-            - Count the characters in each tweet to ensure they meet length requirements
-            - Use evergreen references to podcast content while staying relevant to current discussions
-
-            4. Evaluate and refine tweets:
-            - Assess each tweet for engagement potential, relevance, and clarity
-            - Refine the tweets to improve their impact and adhere to guidelines
-            - Ensure references to podcast content are accurate and timeless
-            - Verify the tweet adds value to ongoing conversations
-
-            5. Select the best tweet:
-            - Choose the most effective tweet based on your evaluation
-            - Explain why this tweet best combines recent context with podcast insights
-            - Verify it aligns with The Rollup's messaging and style
-            </reasoning>
-
-            After your reasoning, create and post your tweet using the create_tweet() function.
-
-
-            Task 2: Check for and reply to new Twitter mentions
-
-            Use the get_mentions() function to retrieve new mentions. For each mention newer than the last_mention_id:
-
-            <reasoning>
-            1. Analyze the mention:
-            - Summarize the content of the mention
-            - Identify any specific questions or topics related to blockchain and cryptocurrency
-            - Determine the sentiment (positive, neutral, negative) of the mention
-
-            2. Determine reply appropriateness:
-            - Check if you've already responded using has_replied_to()
-            - Assess if the mention requires a response based on its content and relevance
-            - Explain your decision to reply or not
-
-            3. Craft a response (if needed):
-            - Outline key points to address in your reply
-            - Consider how to add value or insights to the conversation
-            - Draft a response that is engaging, informative, and aligned with your persona
-
-            4. Review and refine:
-            - Ensure the response adheres to character limits and style guidelines
-            - Check that the reply is relevant to blockchain and cryptocurrency
-            - Verify that the tone is friendly and encouraging further discussion
-            </reasoning>
-
-            If you decide to reply:
-            1. Create a response using the reply_to_tweet() function
-            2. Mark the tweet as replied using the add_replied_tweet() function
-
-            Task 3: Interact with KOLs
-
-            For each KOL in the provided list:
-
-            <reasoning>
-            1. Retrieve and analyze recent tweets:
-            - Use get_user_tweets() to fetch recent tweets
-            - Summarize the main topics and themes in the KOL's recent tweets
-            - Identify tweets specifically related to blockchain and cryptocurrency
-
-            2. Select a tweet to reply to:
-            - List the top 3 most relevant tweets for potential interaction
-            - For each tweet, explain its relevance to blockchain/cryptocurrency and potential for engagement
-            - Choose the best tweet for reply, justifying your selection
-
-            3. Formulate a reply:
-            - Identify unique insights or perspectives you can add to the conversation
-            - Draft 2-3 potential replies, each offering a different angle or value-add
-            - Evaluate each draft for engagement potential, relevance, and alignment with your persona
-
-            4. Finalize the reply:
-            - Select the best reply from your drafts
-            - Ensure the chosen reply meets all guidelines (character limit, style, etc.)
-            - Explain why this reply is the most effective for interacting with the KOL and promoting The Rollup Podcast
-            </reasoning>
-
-            After your reasoning:
-            1. Select the most relevant and recent tweet to reply to
-            2. Create a reply for the selected tweet using the reply_to_tweet() function
-
-            General Guidelines:
-            1. Stay in character with consistent personality traits
-            2. Ensure all interactions are relevant to blockchain and cryptocurrency
-            3. Be friendly, witty, and engaging
-            4. Share interesting insights or thought-provoking perspectives when relevant
-            5. Ask follow-up questions to encourage discussion when appropriate
-            6. Adhere to the character limits and style guidelines
-
-            Output your actions in the following format:
-
-            <knowledge_base_query>
-            [Your knowledge base query results and insights used]
-            </knowledge_base_query>
-
-            <recent_tweets_analysis>
-            [Your analysis of the 9 recent tweets from The Rollup accounts]
-            </recent_tweets_analysis>
-
-            <original_tweets>
-            <tweet_1>[Content for new tweet]</tweet_1>
-            </original_tweets>
-
-            <mention_replies>
-            [Your replies to any new mentions, if applicable]
-            </mention_replies>
-
-            <kol_interactions>
-            [For each of the KOLs in the provided list:]
-            <kol_name>[KOL's name]</kol_name>
-            <reply_to>
-                <tweet_id>[ID of the tweet you're replying to]</tweet_id>
-                <reply_content>[Your reply content]</reply_content>
-            </reply_to>
-            </kol_interactions>
-
-            Remember to use the provided functions as needed and adhere to all guidelines and rules throughout your interactions.
-            """
+            # Fetch new mentions, the context accounts' recent tweets and the selected
+            # KOLs' recent tweets up front, so the agent doesn't spend tool round trips
+            # on them. These requests run concurrently with each other and with the
+            # podcast query (prefetched during the wait when possible)
+            mentions, podcast_query, *fetched_tweets = await asyncio.gather(
+                twitter_client.get_mentions(
+                    config['character']['accountid'],
+                    since_id=twitter_state.last_mention_id,
+                    # Page size; every page since the cursor is fetched, so the
+                    # cursor below never skips over unfetched mentions
+                    max_results=MAX_MENTIONS_PER_INTERVAL
+                ),
+                fresh_podcast_query(next_podcast_query),
+                *(
+                    twitter_client.get_user_tweets(account_id, max_results=CONTEXT_TWEETS_PER_ACCOUNT)
+                    for account_id in CONTEXT_ACCOUNT_IDS
+                ),
+                *(
+                    twitter_client.get_user_tweets(kol['user_id'], max_results=KOL_TWEETS_PER_CYCLE)
+                    for kol in selected_kols
+                ),
+            )
+            next_podcast_query = None
+            context_tweets = fetched_tweets[:len(CONTEXT_ACCOUNT_IDS)]
+            kol_tweets = fetched_tweets[len(CONTEXT_ACCOUNT_IDS):]
+
+            replied = twitter_state.has_replied_to_bulk([m.id for m in mentions])
+            new_mentions = [m for m in mentions if m.id not in replied]
+            print_system(f"Found {len(new_mentions)} new mentions to review")
+
+            # Poll less often while nobody is mentioning us, and return to the
+            # base interval as soon as new mentions show up
+            twitter_state.record_mention_poll(len(new_mentions))
+            next_check_at = cycle_started_at + twitter_state.next_check_interval()
+
+            mentions_xml = "\n".join(
+                MENTION_XML_TEMPLATE.format(tweet_id=mention.id, author_id=mention.author_id, text=mention.text)
+                for mention in new_mentions
+            ) or "No new mentions."
+
+            # Create KOL XML structure for the prompt; with the default NUM_KOLS of 1
+            # that is a single template fill
+            if len(selected_kols) == 1:
+                kol = selected_kols[0]
+                kol_xml = KOL_XML_TEMPLATE.format(
+                    index=1, username=kol['username'], user_id=kol['user_id'],
+                    tweets_xml=_tweets_xml(kol_tweets[0], "No recent tweets available."),
+                )
+            else:
+                kol_xml = "\n".join(
+                    KOL_XML_TEMPLATE.format(
+                        index=i, username=kol['username'], user_id=kol['user_id'],
+                        tweets_xml=_tweets_xml(tweets, "No recent tweets available."),
+                    )
+                    for i, (kol, tweets) in enumerate(zip(selected_kols, kol_tweets), 1)
+                ) or "No KOLs configured."
+
+            recent_tweets_xml = _tweets_xml(
+                (tweet for tweets in context_tweets for tweet in tweets), "No recent tweets available."
+            )
+
+            thought = TWITTER_AUTOMATION_PROMPT.format(
+                kol_xml=kol_xml,
+                account_id=config['character']['accountid'],
+                mention_check_interval=MENTION_CHECK_INTERVAL,
+                last_mention_id=twitter_state.last_mention_id,
+                current_time=clock_time(),
+                podcast_query=podcast_query,
+                mentions_xml=mentions_xml,
+                recent_tweets_xml=recent_tweets_xml,
+            )
 
             # Process chunks as they arrive using async for
-            async for chunk in agent_executor.astream(
+            async for chunk in run_with_progress(
+                agent_executor.astream,
                 {"messages": [HumanMessage(content=thought)]},
                 runnable_config
             ):
-                print_system(chunk)
                 if "agent" in chunk:
                     response = chunk["agent"]["messages"][0].content
                     print_ai(format_ai_message_content(response))
@@ -971,24 +1099,29 @@ async def run_twitter_automation(agent_executor, config, runnable_config):
                                     tweet_id = item['input'].get('__arg1')
                                     if tweet_id:
                                         print_system(f"Adding tweet {tweet_id} to replied database...")
-                                        result = twitter_state.add_replied_tweet(tweet_id)
+                                        result = await asyncio.to_thread(twitter_state.add_replied_tweet, tweet_id)
                                         print_system(result)
-                                        
-                                        # Update state after successful reply
-                                        twitter_state.last_mentigiton_id = tweet_id
-                                        twitter_state.last_check_time = datetime.now()
-                                        twitter_state.save()
+                                        # The mention cursor only advances from the fetched
+                                        # mentions after the turn, so there is no state to save here
                                 
                 elif "tools" in chunk:
                     print_system(chunk["tools"]["messages"][0].content)
                 print_system("-------------------")
 
-            print_system(f"Completed cycle. Waiting {MENTION_CHECK_INTERVAL/60} minutes before next check...")
-            await asyncio.sleep(MENTION_CHECK_INTERVAL)
+            # Everything fetched this cycle has been handed to the agent
+            if mentions:
+                twitter_state.last_mention_id = max((m.id for m in mentions), key=int)
+                await twitter_state.save_async()
+
+            # The wait until next_check_at happens at the top of the loop, where
+            # twitter_state.wake() can cut it short
+            print_system("Completed cycle.")
 
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            # Under asyncio.run, Ctrl+C reaches this task as a cancellation
             print_system("\nSaving state and exiting...")
             twitter_state.save()
+            flush_output()
             sys.exit(0)
             
         except Exception as e:
@@ -996,10 +1129,11 @@ async def run_twitter_automation(agent_executor, config, runnable_config):
             print_error(f"Error type: {type(e).__name__}")
             if hasattr(e, '__traceback__'):
                 import traceback
-                traceback.print_tb(e.__traceback__)
+                # Through print_error so it stays in order with the queued output
+                print_error("".join(traceback.format_tb(e.__traceback__)).rstrip("\n"))
             
             print_system("Continuing after error...")
-            await asyncio.sleep(MENTION_CHECK_INTERVAL)
+            next_check_at = time.monotonic() + MENTION_CHECK_INTERVAL
 
 
 async def main():
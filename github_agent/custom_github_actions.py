@@ -3,10 +3,13 @@ from json import dumps
 import pandas as pd
 from github import Github, GithubException
 from langchain.tools import Tool
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
 import re
 import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 class GitHubAPIWrapper:
     def __init__(self, github_token: str):
@@ -17,12 +20,27 @@ class GitHubAPIWrapper:
         }
         self.endpoint = 'https://api.github.com/graphql'
 
+        # Reuse one keep-alive connection pool for all queries instead of a new
+        # TCP + TLS handshake per profile. The queries are read-only, so POSTs
+        # are safe to retry on transient gateway errors.
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.mount('https://', HTTPAdapter(
+            pool_connections=8,
+            pool_maxsize=8,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=frozenset({'POST'})
+            )
+        ))
+
     def execute_query(self, query: str, variables: Dict) -> Dict:
         """Execute a GraphQL query against GitHub's API."""
-        response = requests.post(
+        response = self.session.post(
             self.endpoint,
-            json={'query': query, 'variables': variables},
-            headers=self.headers
+            json={'query': query, 'variables': variables}
         )
         response.raise_for_status()
         return response.json()
@@ -100,20 +118,81 @@ def verify_github_auth(client: Github) -> bool:
         return False
 
 
+# Profile URL patterns, compiled once since they run for every CSV row
+GITHUB_USERNAME_PATTERNS = [
+    re.compile(r"github\.com/([^/]+)/?$"),
+    re.compile(r"github\.com/([^/]+)/?(?:\?|#|$)"),
+]
+
+# Profiles evaluated in parallel; matches the API wrapper's connection pool size
+MAX_PROFILE_WORKERS = 8
+
 def extract_username_from_url(url: str) -> str:
     """Extract GitHub username from profile URL."""
-    patterns = [
-        r"github\.com/([^/]+)/?$",
-        r"github\.com/([^/]+)/?(?:\?|#|$)",
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, url)
+    for pattern in GITHUB_USERNAME_PATTERNS:
+        match = pattern.search(url)
         if match:
             return match.group(1)
     
     raise ValueError(f"Could not extract username from URL: {url}")
 
+def evaluate_github_profile(github_api: GitHubAPIWrapper, url, min_commits: int, idx: int = 0, total: int = 1) -> Tuple[Dict, str]:
+    """Evaluate a single GitHub profile URL. Returns the evaluation and the candidate's name."""
+    print(f"Processing URL {idx + 1}/{total}: {url}")
+    try:
+        if not isinstance(url, str) or not url.startswith('https://github.com/'):
+            return {
+                "github_url": url,
+                "error": "Invalid GitHub URL format",
+                "decision": "REJECTED",
+                "reason": "Invalid GitHub URL format"
+            }, str(url)
+
+        username = extract_username_from_url(url)
+        print(f"Extracted username: {username}")
+        
+        # Get user data using GraphQL
+        user_data = github_api.get_user_profile_data(username)
+        if user_data is None:
+            raise ValueError("Could not fetch user data")
+        
+        contributions = user_data['contributions']
+        top_languages = user_data['top_languages']
+        primary_language = user_data['primary_language']
+        
+        print(f"Found {contributions} contributions for {username}")
+        print(f"Top languages: {', '.join(top_languages)}")
+        
+        # Make decision based on contribution count
+        meets_requirements = contributions >= min_commits
+        
+        evaluation = {
+            "github_url": url,
+            "username": username,
+            "total_contributions": contributions,
+            "top_languages": top_languages,
+            "primary_language": primary_language,
+            "criteria_evaluation": {
+                "contributions": f"{contributions}/{min_commits} required contributions",
+                "languages": f"Primary language: {primary_language}, Top languages: {', '.join(top_languages)}"
+            },
+            "decision": "ACCEPTED" if meets_requirements else "REJECTED",
+            "reason": (
+                "Meets all criteria" if meets_requirements else
+                f"Insufficient contributions ({contributions}/{min_commits})"
+            )
+        }
+        return evaluation, username
+        
+    except Exception as e:
+        print(f"Error processing {url}: {e}")
+        return {
+            "github_url": url,
+            "error": str(e),
+            "decision": "REJECTED",
+            "reason": f"Error processing profile: {str(e)}"
+        }, url
+
 def evaluate_github_profiles_from_csv(github_api: GitHubAPIWrapper, 
                                     csv_path: str = "github_agent/csvs/PMF or Die_ AI Agent Hackathon @ Hyper(r)House - Guests - 2025-01-30-09-24-49.csv",
                                     url_column: str = "Github URL",
@@ -138,70 +217,21 @@ def evaluate_github_profiles_from_csv(github_api: GitHubAPIWrapper,
         accepted_candidates = []
         rejected_candidates = []
         
-        # Process each URL
-        for idx, url in enumerate(df[url_column]):
-            print(f"Processing URL {idx + 1}/{len(df)}: {url}")
-            try:
-                if not isinstance(url, str) or not url.startswith('https://github.com/'):
-                    results.append({
-                        "github_url": url,
-                        "error": "Invalid GitHub URL format",
-                        "decision": "REJECTED",
-                        "reason": "Invalid GitHub URL format"
-                    })
-                    rejected_candidates.append(str(url))
-                    continue
-
-                username = extract_username_from_url(url)
-                print(f"Extracted username: {username}")
-                
-                # Get user data using GraphQL
-                user_data = github_api.get_user_profile_data(username)
-                if user_data is None:
-                    raise ValueError("Could not fetch user data")
-                
-                contributions = user_data['contributions']
-                top_languages = user_data['top_languages']
-                primary_language = user_data['primary_language']
-                
-                print(f"Found {contributions} contributions for {username}")
-                print(f"Top languages: {', '.join(top_languages)}")
-                
-                # Make decision based on contribution count
-                meets_requirements = contributions >= min_commits
-                
-                evaluation = {
-                    "github_url": url,
-                    "username": username,
-                    "total_contributions": contributions,
-                    "top_languages": top_languages,
-                    "primary_language": primary_language,
-                    "criteria_evaluation": {
-                        "contributions": f"{contributions}/{min_commits} required contributions",
-                        "languages": f"Primary language: {primary_language}, Top languages: {', '.join(top_languages)}"
-                    },
-                    "decision": "ACCEPTED" if meets_requirements else "REJECTED",
-                    "reason": (
-                        "Meets all criteria" if meets_requirements else
-                        f"Insufficient contributions ({contributions}/{min_commits})"
-                    )
-                }
-                
-                results.append(evaluation)
-                if meets_requirements:
-                    accepted_candidates.append(username)
-                else:
-                    rejected_candidates.append(username)
-                
-            except Exception as e:
-                print(f"Error processing {url}: {e}")
-                results.append({
-                    "github_url": url,
-                    "error": str(e),
-                    "decision": "REJECTED",
-                    "reason": f"Error processing profile: {str(e)}"
-                })
-                rejected_candidates.append(url)
+        # Evaluate profiles concurrently; each one is a network round trip to
+        # GitHub, and map() keeps the results in CSV order
+        urls = list(df[url_column])
+        with ThreadPoolExecutor(max_workers=MAX_PROFILE_WORKERS) as executor:
+            outcomes = list(executor.map(
+                lambda item: evaluate_github_profile(github_api, item[1], min_commits, item[0], len(urls)),
+                enumerate(urls)
+            ))
+        
+        for evaluation, candidate in outcomes:
+            results.append(evaluation)
+            if evaluation["decision"] == "ACCEPTED":
+                accepted_candidates.append(candidate)
+            else:
+                rejected_candidates.append(candidate)
 
         summary = f"""
 GitHub Profile Evaluation Summary:
@@ -155,7 +155,7 @@ def main():
     print(f"Found {len(video_files)} video files to process")
     
     # Process each video file
-    for video_path in video_files:
+    for i, video_path in enumerate(video_files):
         try:
             process_video(video_path)
         except Exception as e:
@@ -163,7 +163,9 @@ def main():
             continue
         
         # Add a small delay between processing files to avoid rate limiting
-        time.sleep(2)
+        # (nothing left to pace after the last one)
+        if i < len(video_files) - 1:
+            time.sleep(2)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
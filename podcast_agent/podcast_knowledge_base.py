@@ -6,13 +6,16 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
-from typing import List, Dict
-import chromadb
+from typing import List, Dict, Tuple
+import hashlib
 from datetime import datetime
 from pydantic import BaseModel
-from sentence_transformers import SentenceTransformer
-import json
+import orjson
 from base_utils.utils import print_system, print_error
+from base_utils.embeddings import CachedEmbeddingFunction, EMBEDDING_CACHE_KEY, COLLECTION_METADATA, get_chroma_client, load_embedding_model
+
+# Segments per collection.add call when ingesting many transcripts at once
+ADD_BATCH_SIZE = 1000
 
 class PodcastSegment(BaseModel):
     id: str  # We'll generate this
@@ -20,38 +23,42 @@ class PodcastSegment(BaseModel):
     content: str
     source_file: str
     timestamp: str = None  # Optional, if available in future
+    content_hash: str = None  # Hash of the source file, used to detect edited transcripts
+    source_mtime_ns: int = None  # Source file mtime/size when indexed; lets unchanged files skip hashing
+    source_size: int = None
 
 class PodcastKnowledgeBase:
     def __init__(self, collection_name: str = "podcast_knowledge"):
+        # Source files already in the collection (name -> source path and content
+        # hash), scanned once and kept up to date
+        self._processed_files = None
+
         # Initialize ChromaDB client with persistence
-        self.client = chromadb.PersistentClient(path="./chroma_db")
+        self.client = get_chroma_client()
         
         # Use the same advanced embedding model as Twitter KB
-        self.embedding_model = SentenceTransformer('all-mpnet-base-v2')
-        
-        # Create embedding function
-        class EmbeddingFunction:
-            def __init__(self, model):
-                self.model = model
-            
-            def __call__(self, input: List[str]) -> List[List[float]]:
-                embeddings = self.model.encode(input)
-                return embeddings.tolist()
+        self.embedding_model = load_embedding_model()
         
-        embedding_func = EmbeddingFunction(self.embedding_model)
+        # Reuse cached vectors for text that has already been embedded
+        self.embedding_func = CachedEmbeddingFunction(self.embedding_model, EMBEDDING_CACHE_KEY)
         
         # Create or get collection
         try:
             self.collection = self.client.get_or_create_collection(
                 name=collection_name,
-                embedding_function=embedding_func
+                embedding_function=self.embedding_func,
+                metadata=COLLECTION_METADATA
             )
         except Exception as e:
             print_error(f"Error initializing collection: {e}")
             raise
 
-    def add_segments(self, segments: List[PodcastSegment]):
-        """Add podcast segments to the knowledge base."""
+    def add_segments(self, segments: List[PodcastSegment]) -> bool:
+        """Add podcast segments to the knowledge base. Returns False if the add failed.
+
+        Segments are upserted, so a re-ingested transcript overwrites its old
+        segments in place instead of requiring them to be deleted first.
+        """
         documents = [segment.content for segment in segments]
         ids = [segment.id for segment in segments]
         metadata = [
@@ -59,37 +66,110 @@ class PodcastKnowledgeBase:
                 "speaker": segment.speaker,
                 "source_file": segment.source_file,
                 "timestamp": segment.timestamp or datetime.now().isoformat(),
+                "content_hash": segment.content_hash or "",
+                # 0 means unknown, which always falls back to comparing hashes
+                "source_mtime_ns": segment.source_mtime_ns or 0,
+                "source_size": segment.source_size or 0,
             }
             for segment in segments
         ]
         
         try:
-            self.collection.add(
+            self.collection.upsert(
                 documents=documents,
                 ids=ids,
                 metadatas=metadata
             )
             print_system(f"Added {len(segments)} segments to knowledge base")
+            return True
         except Exception as e:
             print_error(f"Error adding segments: {e}")
+            return False
+
+    def _load_segments(self, file_path: str, raw: bytes = None, stat: os.stat_result = None) -> Tuple[str, os.stat_result, List[PodcastSegment]]:
+        """Read a podcast transcript JSON file into segments, with the file's content hash and stat.
+
+        Pass raw/stat when the caller has already read the file, so it isn't read twice.
+        """
+        if stat is None:
+            stat = os.stat(file_path)
+        if raw is None:
+            with open(file_path, 'rb') as f:
+                raw = f.read()
+        content_hash = hashlib.sha256(raw).hexdigest()
+        transcript_data = orjson.loads(raw)
+        
+        return content_hash, stat, [
+            PodcastSegment(
+                id=f"{os.path.basename(file_path)}_{idx}",
+                speaker=entry['speaker'],
+                content=entry['content'],
+                source_file=file_path,
+                content_hash=content_hash,
+                source_mtime_ns=stat.st_mtime_ns,
+                source_size=stat.st_size
+            )
+            for idx, entry in enumerate(transcript_data)
+        ]
+
+    def _mark_processed(self, file_path: str, content_hash: str, stat: os.stat_result):
+        if self._processed_files is not None:
+            self._processed_files[os.path.basename(file_path)] = {
+                "source_file": file_path,
+                "content_hash": content_hash,
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+            }
+
+    def _delete_stale_segments(self, source_file: str, keep_ids: set):
+        """Delete a transcript's segments that weren't overwritten by its new version."""
+        try:
+            old_ids = self.collection.get(where={"source_file": source_file}, include=[])["ids"]
+            stale_ids = [segment_id for segment_id in old_ids if segment_id not in keep_ids]
+            if stale_ids:
+                self.collection.delete(ids=stale_ids)
+        except Exception as e:
+            print_error(f"Error removing stale segments of {source_file}: {e}")
+
+    def _discard_partial_file(self, json_file: str, file_path: str, entry: Dict[str, str] = None):
+        """Make sure a file whose add failed is retried on the next run.
+
+        A new file's partial segments are removed so it is seen as new again. An
+        edited file keeps its segments, old and overwritten alike, so it stays
+        searchable; its stored hash and stat are cleared so it is seen as changed.
+        """
+        try:
+            if entry is None:
+                self.collection.delete(where={"source_file": file_path})
+                return
+            sources = {entry["source_file"], file_path}
+            ids = self.collection.get(where={"source_file": {"$in": list(sources)}}, include=[])["ids"]
+            if ids:
+                unknown = {"content_hash": "", "source_mtime_ns": 0, "source_size": 0}
+                self.collection.update(ids=ids, metadatas=[unknown] * len(ids))
+            entry.update(content_hash="", mtime_ns=0, size=0)
+        except Exception as e:
+            print_error(f"Error resetting partial segments of {file_path}: {e}")
+
+    def _record_file_stat(self, json_file: str, stat: os.stat_result):
+        """Store an unchanged file's current mtime/size on its segments so later runs skip hashing it."""
+        entry = self._processed_files[json_file]
+        try:
+            ids = self.collection.get(where={"source_file": entry["source_file"]}, include=[])["ids"]
+            if ids:
+                file_stat = {"source_mtime_ns": stat.st_mtime_ns, "source_size": stat.st_size}
+                self.collection.update(ids=ids, metadatas=[file_stat] * len(ids))
+            entry.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+        except Exception as e:
+            print_error(f"Error recording file metadata for {json_file}: {e}")
 
     def process_json_file(self, file_path: str):
         """Process a podcast transcript JSON file and add it to the knowledge base."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                transcript_data = json.load(f)
-            
-            segments = []
-            for idx, entry in enumerate(transcript_data):
-                segment = PodcastSegment(
-                    id=f"{os.path.basename(file_path)}_{idx}",
-                    speaker=entry['speaker'],
-                    content=entry['content'],
-                    source_file=file_path
-                )
-                segments.append(segment)
-            
-            self.add_segments(segments)
+            content_hash, stat, segments = self._load_segments(file_path)
+            if not self.add_segments(segments):
+                return False
+            self._mark_processed(file_path, content_hash, stat)
             print_system(f"Successfully processed {file_path}")
             return True
             
@@ -97,6 +177,13 @@ class PodcastKnowledgeBase:
             print_error(f"Error processing {file_path}: {e}")
             return False
 
+    def warm_queries(self, queries: List[str]):
+        """Pre-embed queries that are known to recur, in a single encoder batch."""
+        try:
+            self.embedding_func.warm(queries)
+        except Exception as e:
+            print_error(f"Error warming query embeddings: {e}")
+
     def query_knowledge_base(self, query: str, n_results: int = 5) -> List[Dict]:
         """Query the knowledge base for relevant podcast segments."""
         try:
@@ -123,8 +210,7 @@ class PodcastKnowledgeBase:
                     "relevance_score": 1 - distance
                 })
             
-            # Sort by relevance score
-            formatted_results.sort(key=lambda x: x['relevance_score'], reverse=True)
+            # Chroma already returns results nearest-first, i.e. by descending relevance
             
             print_system(f"Found {len(formatted_results)} relevant segments")
             return formatted_results
@@ -133,6 +219,10 @@ class PodcastKnowledgeBase:
             print_error(f"Error querying knowledge base: {e}")
             return []
 
+    def query_and_format(self, query: str) -> str:
+        """Query the knowledge base and return the formatted results (for agent tools)."""
+        return self.format_query_results(self.query_knowledge_base(query))
+
     def format_query_results(self, results: List[Dict]) -> str:
         """Format query results into a readable string."""
         if not results:
@@ -153,30 +243,49 @@ class PodcastKnowledgeBase:
         """Clear all segments from the knowledge base."""
         try:
             print_system("Clearing knowledge base collection...")
-            ids = self.collection.get()["ids"]
+            ids = self.collection.get(include=[])["ids"]
             if ids:
                 self.collection.delete(ids=ids)
                 print_system("Knowledge base cleared successfully")
             else:
                 print_system("Knowledge base is already empty")
+            self._processed_files = {}
             return True
         except Exception as e:
             print_error(f"Error clearing knowledge base: {str(e)}")
             return False
 
-    def get_processed_files(self) -> set:
-        """Get a set of already processed file names from the metadata."""
+    def _get_processed_index(self) -> Dict[str, Dict[str, str]]:
+        """Map processed file names to their source path and content hash.
+
+        The collection is only scanned on the first call; later calls return the
+        cached index, which process_json_file and clear_collection keep current.
+        """
+        if self._processed_files is not None:
+            return self._processed_files
         try:
-            metadata = self.collection.get()
-            if not metadata.get("metadatas"):
-                return set()
-            return {os.path.basename(m["source_file"]) for m in metadata["metadatas"]}
+            metadata = self.collection.get(include=["metadatas"])
+            index = {}
+            for m in metadata.get("metadatas") or []:
+                index.setdefault(os.path.basename(m["source_file"]), {
+                    "source_file": m["source_file"],
+                    # Segments indexed before hashes were recorded have none
+                    "content_hash": m.get("content_hash", ""),
+                    "mtime_ns": m.get("source_mtime_ns", 0),
+                    "size": m.get("source_size", 0),
+                })
+            self._processed_files = index
+            return self._processed_files
         except Exception as e:
             print_error(f"Error getting processed files: {e}")
-            return set()
+            return {}
+
+    def get_processed_files(self) -> set:
+        """Get a set of already processed file names from the metadata."""
+        return set(self._get_processed_index())
 
     def process_all_json_files(self, directory: str = "/Users/amr/Hyperbolic-AgentKit/youtube_scraper/jsonoutputs"):
-        """Process all JSON files in the specified directory, skipping already processed ones."""
+        """Process new and changed JSON files in the specified directory, skipping unchanged ones."""
         try:
             # Convert to absolute path relative to the project root
             abs_directory = os.path.join(parent_dir, directory)
@@ -187,22 +296,74 @@ class PodcastKnowledgeBase:
             
             # Get list of all JSON files and already processed files
             json_files = [f for f in os.listdir(abs_directory) if f.endswith('.json')]
-            processed_files = self.get_processed_files()
+            processed_files = self._get_processed_index()
             
-            # Filter out already processed files
-            new_files = [f for f in json_files if f not in processed_files]
+            # Filter out processed files whose contents haven't changed since. A
+            # matching mtime and size is taken as unchanged; otherwise the file is
+            # read once and its hash compared, and changed files keep those bytes
+            # for loading below
+            new_files = []
+            changed_files = {}
+            for json_file in json_files:
+                entry = processed_files.get(json_file)
+                if entry is None:
+                    new_files.append(json_file)
+                    continue
+                file_path = os.path.join(abs_directory, json_file)
+                stat = os.stat(file_path)
+                if (entry["mtime_ns"], entry["size"]) == (stat.st_mtime_ns, stat.st_size):
+                    continue
+                with open(file_path, 'rb') as f:
+                    raw = f.read()
+                if hashlib.sha256(raw).hexdigest() == entry["content_hash"]:
+                    # Touched but not edited: remember the new mtime so it isn't hashed again
+                    self._record_file_stat(json_file, stat)
+                else:
+                    changed_files[json_file] = (raw, stat)
             
-            if not new_files:
-                print_system("No new JSON files to process")
+            if not new_files and not changed_files:
+                print_system("No new or changed JSON files to process")
                 return
             
-            print_system(f"Found {len(new_files)} new JSON files to process")
+            print_system(f"Found {len(new_files)} new and {len(changed_files)} changed JSON files to process")
             
-            for json_file in new_files:
+            # Gather segments from every new file first so they are embedded in
+            # large batches rather than one small encode per transcript
+            segments = []
+            loaded_files = []
+            for json_file in new_files + list(changed_files):
                 file_path = os.path.join(abs_directory, json_file)
-                self.process_json_file(file_path)
+                try:
+                    content_hash, stat, file_segments = self._load_segments(file_path, *changed_files.get(json_file, ()))
+                    segments.extend(file_segments)
+                    loaded_files.append((file_path, content_hash, stat))
+                except Exception as e:
+                    # Nothing has been written yet, so the old segments stay searchable
+                    print_error(f"Error processing {file_path}: {e}")
+                    continue
+            
+            # Replacement segments reuse the old IDs and are upserted over them, so
+            # an edited transcript stays searchable throughout
+            failed_sources = set()
+            for start in range(0, len(segments), ADD_BATCH_SIZE):
+                batch = segments[start:start + ADD_BATCH_SIZE]
+                if not self.add_segments(batch):
+                    failed_sources.update(segment.source_file for segment in batch)
+            
+            new_ids = {}
+            for segment in segments:
+                new_ids.setdefault(segment.source_file, set()).add(segment.id)
+            for file_path, content_hash, stat in loaded_files:
+                json_file = os.path.basename(file_path)
+                if file_path in failed_sources:
+                    self._discard_partial_file(json_file, file_path, processed_files.get(json_file))
+                    continue
+                if json_file in changed_files:
+                    # Every batch for this file is in; drop old segments past the new end
+                    self._delete_stale_segments(processed_files[json_file]["source_file"], new_ids.get(file_path, set()))
+                self._mark_processed(file_path, content_hash, stat)
                 
-            print_system("Finished processing all new JSON files")
+            print_system("Finished processing all new and changed JSON files")
             
         except Exception as e:
             print_error(f"Error processing JSON files: {e}")
@@ -211,7 +372,7 @@ class PodcastKnowledgeBase:
         """Get statistics about the knowledge base collection."""
         try:
             count = self.collection.count()
-            metadata = self.collection.get()
+            metadata = self.collection.get(include=["metadatas"])
             last_update = None
             if metadata.get("metadatas"):
                 # Get most recent timestamp
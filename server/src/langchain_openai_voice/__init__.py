@@ -1,5 +1,6 @@
 import asyncio
-import json
+import logging
+import orjson
 import websockets
 
 from contextlib import asynccontextmanager
@@ -12,6 +13,8 @@ from langchain_core.utils import secret_from_env
 
 from pydantic import BaseModel, Field, SecretStr, PrivateAttr
 
+logger = logging.getLogger(__name__)
+
 DEFAULT_MODEL = "gpt-4o-realtime-preview-2024-10-01"
 DEFAULT_URL = "wss://api.openai.com/v1/realtime"
 
@@ -30,12 +33,41 @@ EVENTS_TO_IGNORE = {
     "response.output_item.done",
 }
 
+# Events that are only logged: type -> (level, message, field to log or None for the whole event)
+LOGGED_EVENTS = {
+    "error": (logging.ERROR, "error: %s", None),
+    "response.audio_transcript.done": (logging.INFO, "model: %s", "transcript"),
+    "conversation.item.input_audio_transcription.completed": (logging.INFO, "user: %s", "transcript"),
+}
+
+# Realtime function definitions per tool name. The server passes the same tool
+# objects to every connection, so each schema is only built once. There is one
+# entry per name, so the cache can't grow past the tool set, and an entry only
+# counts as a hit for the exact tool object it was built from.
+_TOOL_DEF_CACHE: dict[str, tuple[BaseTool, dict[str, Any]]] = {}
+
+
+def _tool_def(tool: BaseTool) -> dict[str, Any]:
+    cached = _TOOL_DEF_CACHE.get(tool.name)
+    if cached is None or cached[0] is not tool:
+        cached = (
+            tool,
+            {
+                "type": "function",
+                "name": tool.name,
+                "description": tool.description,
+                "parameters": {"type": "object", "properties": tool.args},
+            },
+        )
+        _TOOL_DEF_CACHE[tool.name] = cached
+    return cached[1]
+
 
 @asynccontextmanager
 async def connect(*, api_key: str, model: str, url: str) -> AsyncGenerator[
     tuple[
         Callable[[dict[str, Any] | str], Coroutine[Any, Any, None]],
-        AsyncIterator[dict[str, Any]],
+        AsyncIterator[str],
     ],
     None,
 ]:
@@ -59,14 +91,16 @@ async def connect(*, api_key: str, model: str, url: str) -> AsyncGenerator[
     try:
 
         async def send_event(event: dict[str, Any] | str) -> None:
-            formatted_event = json.dumps(event) if isinstance(event, dict) else event
+            formatted_event = orjson.dumps(event).decode() if isinstance(event, dict) else event
             await websocket.send(formatted_event)
 
-        async def event_stream() -> AsyncIterator[dict[str, Any]]:
+        # Events are yielded as raw text so they can be relayed without being
+        # re-serialized; the consumer parses them once
+        async def event_stream() -> AsyncIterator[str]:
             async for raw_event in websocket:
-                yield json.loads(raw_event)
+                yield raw_event
 
-        stream: AsyncIterator[dict[str, Any]] = event_stream()
+        stream: AsyncIterator[str] = event_stream()
 
         yield send_event, stream
     finally:
@@ -79,21 +113,12 @@ class VoiceToolExecutor(BaseModel):
     """
 
     tools_by_name: dict[str, BaseTool]
-    _trigger_future: asyncio.Future = PrivateAttr(default_factory=asyncio.Future)
-    _lock: asyncio.Lock = PrivateAttr(default_factory=asyncio.Lock)
-
-    async def _trigger_func(self) -> dict:  # returns a tool call
-        return await self._trigger_future
+    # pending tool calls; queued calls are picked up one after another, so
+    # simultaneous calls no longer race
+    _tool_calls: asyncio.Queue = PrivateAttr(default_factory=asyncio.Queue)
 
     async def add_tool_call(self, tool_call: dict) -> None:
-        # lock to avoid simultaneous tool calls racing and missing
-        # _trigger_future being
-        async with self._lock:
-            if self._trigger_future.done():
-                # TODO: handle simultaneous tool calls better
-                raise ValueError("Tool call adding already in progress")
-
-            self._trigger_future.set_result(tool_call)
+        self._tool_calls.put_nowait(tool_call)
 
     async def _create_tool_call_task(self, tool_call: dict) -> asyncio.Task[dict]:
         tool = self.tools_by_name.get(tool_call["name"])
@@ -106,8 +131,8 @@ class VoiceToolExecutor(BaseModel):
 
         # try to parse args
         try:
-            args = json.loads(tool_call["arguments"])
-        except json.JSONDecodeError:
+            args = orjson.loads(tool_call["arguments"])
+        except orjson.JSONDecodeError:
             raise ValueError(
                 f"failed to parse arguments `{tool_call['arguments']}`. Must be valid JSON."
             )
@@ -115,7 +140,7 @@ class VoiceToolExecutor(BaseModel):
         async def run_tool() -> dict:
             result = await tool.ainvoke(args)
             try:
-                result_str = json.dumps(result)
+                result_str = orjson.dumps(result).decode()
             except TypeError:
                 # not json serializable, use str
                 result_str = str(result)
@@ -133,16 +158,14 @@ class VoiceToolExecutor(BaseModel):
         return task
 
     async def output_iterator(self) -> AsyncIterator[dict]:  # yield events
-        trigger_task = asyncio.create_task(self._trigger_func())
+        trigger_task = asyncio.create_task(self._tool_calls.get())
         tasks = set([trigger_task])
         while True:
             done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
             for task in done:
                 tasks.remove(task)
                 if task == trigger_task:
-                    async with self._lock:
-                        self._trigger_future = asyncio.Future()
-                    trigger_task = asyncio.create_task(self._trigger_func())
+                    trigger_task = asyncio.create_task(self._tool_calls.get())
                     tasks.add(trigger_task)
                     tool_call = task.result()
                     try:
@@ -173,6 +196,8 @@ class OpenAIVoiceReactAgent(BaseModel):
     tools: list[BaseTool] | None = None
     url: str = Field(default=DEFAULT_URL)
     voice: str = Field(default="alloy")
+    # realtime turn detection settings; None keeps the API's defaults
+    turn_detection: dict[str, Any] | None = None
 
     async def aconnect(
         self,
@@ -202,72 +227,60 @@ class OpenAIVoiceReactAgent(BaseModel):
             model_receive_stream,
         ):
             # sent tools and instructions with initial chunk
-            tool_defs = [
-                {
-                    "type": "function",
-                    "name": tool.name,
-                    "description": tool.description,
-                    "parameters": {"type": "object", "properties": tool.args},
-                }
-                for tool in tools_by_name.values()
-            ]
-            await model_send(
-                {
-                    "type": "session.update",
-                    "session": {
-                        "instructions": self.instructions,
-                        "input_audio_transcription": {
-                            "model": "whisper-1",
-                        },
-                        "tools": tool_defs,
-                        "voice": self.voice,
-                    },
-                }
-            )
+            tool_defs = [_tool_def(tool) for tool in tools_by_name.values()]
+            session = {
+                "instructions": self.instructions,
+                "input_audio_transcription": {
+                    "model": "whisper-1",
+                },
+                "tools": tool_defs,
+                "voice": self.voice,
+            }
+            if self.turn_detection is not None:
+                session["turn_detection"] = self.turn_detection
+            await model_send({"type": "session.update", "session": session})
             async for stream_key, data_raw in amerge(
                 input_mic=input_stream,
                 output_speaker=model_receive_stream,
                 tool_outputs=tool_executor.output_iterator(),
             ):
+                if stream_key == "input_mic":
+                    # Browser events are already JSON text; relay them as-is
+                    await model_send(data_raw)
+                    continue
+
                 try:
                     data = (
-                        json.loads(data_raw) if isinstance(data_raw, str) else data_raw
+                        orjson.loads(data_raw) if isinstance(data_raw, str) else data_raw
                     )
-                except json.JSONDecodeError:
-                    print("error decoding data:", data_raw)
+                except orjson.JSONDecodeError:
+                    logger.warning("error decoding data: %s", data_raw)
                     continue
 
-                if stream_key == "input_mic":
-                    await model_send(data)
-                elif stream_key == "tool_outputs":
-                    print("tool output", data)
+                if stream_key == "tool_outputs":
+                    logger.debug("tool output %s", data)
                     await model_send(data)
                     await model_send({"type": "response.create", "response": {}})
                 elif stream_key == "output_speaker":
 
                     t = data["type"]
                     if t == "response.audio.delta":
-                        await send_output_chunk(json.dumps(data))
+                        await send_output_chunk(data_raw)
                     elif t == "input_audio_buffer.speech_started":
-                        print("interrupt")
+                        logger.debug("interrupt")
                         # Clear current audio buffer immediately
-                        await send_output_chunk(json.dumps({
+                        await send_output_chunk(orjson.dumps({
                             "type": "audio.clear", 
                             "message": "interrupt"
-                        }))
-                    elif t == "error":
-                        print("error:", data)
+                        }).decode())
                     elif t == "response.function_call_arguments.done":
-                        print("tool call", data)
+                        logger.info("tool call %s", data)
                         await tool_executor.add_tool_call(data)
-                    elif t == "response.audio_transcript.done":
-                        print("model:", data["transcript"])
-                    elif t == "conversation.item.input_audio_transcription.completed":
-                        print("user:", data["transcript"])
-                    elif t in EVENTS_TO_IGNORE:
-                        pass
-                    else:
-                        print(t)
+                    elif t in LOGGED_EVENTS:
+                        level, message, field = LOGGED_EVENTS[t]
+                        logger.log(level, message, data[field] if field else data)
+                    elif t not in EVENTS_TO_IGNORE:
+                        logger.debug("unhandled event %s", t)
 
 
 __all__ = ["OpenAIVoiceReactAgent"]
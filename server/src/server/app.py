@@ -8,13 +8,15 @@ from starlette.websockets import WebSocket
 from dotenv import load_dotenv
 import os
 import json
+import logging
 import psutil
+from functools import lru_cache
 
 load_dotenv(override=True)
 
-from langchain_openai_voice.utils import (
-    amerge,
-)  # First import utils to check if the path is correct
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+logger = logging.getLogger(__name__)
+
 from langchain_openai_voice import OpenAIVoiceReactAgent
 
 from server.utils import websocket_stream
@@ -22,16 +24,44 @@ from server.utils import websocket_stream
 # from server.prompt import INSTRUCTIONS
 from server.tools import TOOLS
 
-from chatbot import loadCharacters, process_character_config
-import os
+from chatbot import loadCharacters, split_character_config
 from server.prompt import BASE_INSTRUCTIONS
-from chatbot import loadCharacters, process_character_config
-import os
 
 # Track active connections
 active_connections = 0
 MAX_CONNECTIONS_PER_INSTANCE = 10
 
+# Server-side VAD settings sent with each session. silence_duration_ms is how
+# long the user must pause before the model starts answering; keep it below the
+# browser's one-second silence gate in audio-processor-worklet.js
+DEFAULT_SILENCE_DURATION_MS = 500
+
+
+def _silence_duration_ms() -> int:
+    """Read VOICE_SILENCE_DURATION_MS, falling back to the default if it isn't a positive integer."""
+    value = os.getenv("VOICE_SILENCE_DURATION_MS")
+    if value is None:
+        return DEFAULT_SILENCE_DURATION_MS
+    try:
+        duration = int(value)
+    except ValueError:
+        duration = 0
+    if duration <= 0:
+        logger.warning(
+            "Invalid VOICE_SILENCE_DURATION_MS=%r; using %d ms",
+            value, DEFAULT_SILENCE_DURATION_MS,
+        )
+        return DEFAULT_SILENCE_DURATION_MS
+    return duration
+
+
+TURN_DETECTION = {
+    "type": "server_vad",
+    "threshold": 0.5,
+    "prefix_padding_ms": 300,
+    "silence_duration_ms": _silence_duration_ms(),
+}
+
 
 async def rolypoly_websocket_endpoint(websocket: WebSocket):
     await websocket_endpoint(websocket, "characters/rolypoly.json")
@@ -41,6 +71,44 @@ async def chainyoda_websocket_endpoint(websocket: WebSocket):
     await websocket_endpoint(websocket, "characters/chainyoda.json")
 
 
+@lru_cache(maxsize=8)
+def _load_instructions(character_file: str, mtime: float) -> tuple[dict, str]:
+    """Load a character and render its static instructions once per (path, mtime).
+
+    An edited character file has a new mtime, so it is re-read on the next
+    connection instead of at the next restart.
+    """
+    logger.info("Loading character configuration from %s", character_file)
+    character = loadCharacters(character_file)[0]
+    static_prefix, _ = split_character_config(character)
+
+    # Combine base instructions with character config
+    static_instructions = BASE_INSTRUCTIONS.format(
+        character_instructions=static_prefix,
+        character_name=character["name"],
+        adjectives=", ".join(character.get("adjectives", [])),
+        topics=", ".join(character.get("topics", [])),
+    )
+    logger.debug("Tools: %s", ", ".join(tool.name for tool in TOOLS))
+    return character, static_instructions
+
+
+def build_instructions(character_file: str) -> str:
+    """Render a character's voice agent instructions for a new connection.
+
+    The static part is cached and identical across connections, so the realtime
+    API can reuse its cached prompt prefix; the post examples are sampled fresh
+    for each connection and appended after it.
+    """
+    character, static_instructions = _load_instructions(
+        character_file, os.path.getmtime(character_file)
+    )
+    _, post_examples_suffix = split_character_config(character)
+    full_instructions = static_instructions + post_examples_suffix
+    logger.debug("Full instructions: %s", full_instructions)
+    return full_instructions
+
+
 async def websocket_endpoint(websocket: WebSocket, character_file: str):
     global active_connections
 
@@ -64,27 +132,14 @@ async def websocket_endpoint(websocket: WebSocket, character_file: str):
 
         browser_receive_stream = websocket_stream(websocket)
 
-        # Load character configuration
-        print("Loading character configuration")
-        character = loadCharacters(character_file)[0]
-        personality = process_character_config(character)
-
-        # Combine base instructions with character config
-        full_instructions = BASE_INSTRUCTIONS.format(
-            character_instructions=personality,
-            character_name=character["name"],
-            adjectives=", ".join(character.get("adjectives", [])),
-            topics=", ".join(character.get("topics", [])),
-        )
-        print("Full instructions:", full_instructions)
-        for tool in TOOLS:
-            print(tool.name)
+        full_instructions = build_instructions(character_file)
 
         agent = OpenAIVoiceReactAgent(
             model="gpt-4o-realtime-preview",
             tools=TOOLS,
             instructions=full_instructions,
             voice="verse",  # "alloy", "ash", "ballad", "coral", "echo", "sage", "shimmer", and "verse"
+            turn_detection=TURN_DETECTION,
         )
 
         await agent.aconnect(browser_receive_stream, websocket.send_text)
@@ -1,31 +1,64 @@
 // source: https://github.com/Azure-Samples/aisearch-openai-rag-audio/blob/7f685a8969e3b63e8c3ef345326c21f5ab82b1c3/app/frontend/public/audio-playback-worklet.js
+// Queued audio lives in a preallocated ring buffer (grown only when it fills up),
+// so playback doesn't reallocate and copy the whole queue on every render quantum.
+const INITIAL_BUFFER_SECONDS = 10;
+// Scale from int16 PCM to [-1, 1), applied as a multiply instead of a divide per sample
+const INT16_TO_FLOAT = 1 / 32768;
+
 class AudioPlaybackWorklet extends AudioWorkletProcessor {
     constructor() {
         super();
         this.port.onmessage = this.handleMessage.bind(this);
-        this.buffer = [];
+        // Samples already scaled to [-1, 1)
+        this.buffer = new Float32Array(sampleRate * INITIAL_BUFFER_SECONDS);
+        this.readIndex = 0;
+        this.available = 0;
     }
 
     handleMessage(event) {
         if (event.data === null) {
-            this.buffer = [];
+            this.readIndex = 0;
+            this.available = 0;
             return;
         }
-        this.buffer.push(...event.data);
+        const samples = event.data;
+        if (this.available + samples.length > this.buffer.length) {
+            this.grow(this.available + samples.length);
+        }
+        const capacity = this.buffer.length;
+        let writeIndex = (this.readIndex + this.available) % capacity;
+        for (let i = 0; i < samples.length; i++) {
+            this.buffer[writeIndex] = samples[i] * INT16_TO_FLOAT;
+            writeIndex = writeIndex + 1 === capacity ? 0 : writeIndex + 1;
+        }
+        this.available += samples.length;
+    }
+
+    grow(minLength) {
+        let length = this.buffer.length * 2;
+        while (length < minLength) {
+            length *= 2;
+        }
+        const grown = new Float32Array(length);
+        for (let i = 0; i < this.available; i++) {
+            grown[i] = this.buffer[(this.readIndex + i) % this.buffer.length];
+        }
+        this.buffer = grown;
+        this.readIndex = 0;
     }
 
     process(inputs, outputs, parameters) {
         const output = outputs[0];
         const channel = output[0];
+        const capacity = this.buffer.length;
 
-        if (this.buffer.length > channel.length) {
-            const toProcess = this.buffer.slice(0, channel.length);
-            this.buffer = this.buffer.slice(channel.length);
-            channel.set(toProcess.map(v => v / 32768));
-        } else {
-            channel.set(this.buffer.map(v => v / 32768));
-            this.buffer = [];
+        const count = Math.min(channel.length, this.available);
+        for (let i = 0; i < count; i++) {
+            channel[i] = this.buffer[this.readIndex];
+            this.readIndex = this.readIndex + 1 === capacity ? 0 : this.readIndex + 1;
         }
+        channel.fill(0, count);
+        this.available -= count;
 
         return true;
     }
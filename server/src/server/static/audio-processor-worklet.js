@@ -1,30 +1,94 @@
 // source: https://github.com/Azure-Samples/aisearch-openai-rag-audio/blob/7f685a8969e3b63e8c3ef345326c21f5ab82b1c3/app/frontend/public/audio-processor-worklet.js
 const MIN_INT16 = -0x8000;
 const MAX_INT16 = 0x7fff;
+// Input quieter than this RMS (about -60 dBFS) counts as silence
+const SILENCE_RMS = 0.001;
+// Keep sending silence this long after sound stops so the server-side VAD
+// still hears the pause that ends a turn; after that, silent frames are dropped
+const SILENCE_HANGOVER_SECONDS = 1;
+// Audio kept while the gate is closed and sent when sound resumes, so the quiet
+// start of speech still reaches the server; must cover the session's
+// turn_detection prefix_padding_ms (300 ms in server/app.py)
+const PRE_ROLL_SECONDS = 0.5;
+// Samples are batched into 100 ms frames before posting, instead of one
+// message per 128-sample render quantum
+const FRAME_SECONDS = 0.1;
 
 class PCMAudioProcessor extends AudioWorkletProcessor {
     constructor() {
         super();
+        this.silentSamples = 0;
+        this.frameLength = Math.round(sampleRate * FRAME_SECONDS);
+        this.frame = new Int16Array(this.frameLength);
+        this.frameIndex = 0;
+        // Ring buffer of the most recent gated-out samples
+        this.preRoll = new Float32Array(Math.round(sampleRate * PRE_ROLL_SECONDS));
+        this.preRollIndex = 0;
+        this.preRollLength = 0;
     }
 
     process(inputs, outputs, parameters) {
         const input = inputs[0];
         if (input.length > 0) {
             const float32Buffer = input[0];
-            const int16Buffer = this.float32ToInt16(float32Buffer);
-            this.port.postMessage(int16Buffer);
+            if (this.isSilent(float32Buffer)) {
+                this.silentSamples += float32Buffer.length;
+                if (this.silentSamples > sampleRate * SILENCE_HANGOVER_SECONDS) {
+                    this.holdPreRoll(float32Buffer);
+                    return true;
+                }
+            } else {
+                this.silentSamples = 0;
+                this.flushPreRoll();
+            }
+            this.appendInt16(float32Buffer);
         }
         return true;
     }
 
-    float32ToInt16(float32Array) {
-        const int16Array = new Int16Array(float32Array.length);
+    isSilent(float32Array) {
+        let energy = 0;
+        for (let i = 0; i < float32Array.length; i++) {
+            energy += float32Array[i] * float32Array[i];
+        }
+        return energy < SILENCE_RMS * SILENCE_RMS * float32Array.length;
+    }
+
+    holdPreRoll(float32Array) {
+        for (let i = 0; i < float32Array.length; i++) {
+            this.preRoll[this.preRollIndex] = float32Array[i];
+            this.preRollIndex = (this.preRollIndex + 1) % this.preRoll.length;
+        }
+        this.preRollLength = Math.min(this.preRollLength + float32Array.length, this.preRoll.length);
+    }
+
+    flushPreRoll() {
+        if (this.preRollLength === 0) {
+            return;
+        }
+        // Oldest sample first; subarray() views avoid copying the ring
+        const start = (this.preRollIndex - this.preRollLength + this.preRoll.length) % this.preRoll.length;
+        if (start + this.preRollLength <= this.preRoll.length) {
+            this.appendInt16(this.preRoll.subarray(start, start + this.preRollLength));
+        } else {
+            this.appendInt16(this.preRoll.subarray(start));
+            this.appendInt16(this.preRoll.subarray(0, this.preRollIndex));
+        }
+        this.preRollLength = 0;
+    }
+
+    appendInt16(float32Array) {
         for (let i = 0; i < float32Array.length; i++) {
             let val = Math.floor(float32Array[i] * MAX_INT16);
             val = Math.max(MIN_INT16, Math.min(MAX_INT16, val));
-            int16Array[i] = val;
+            this.frame[this.frameIndex++] = val;
+            if (this.frameIndex === this.frameLength) {
+                // The frame is transferred, so start a fresh one
+                this.port.postMessage(this.frame, [this.frame.buffer]);
+                this.frame = new Int16Array(this.frameLength);
+                this.frameIndex = 0;
+            }
         }
-        return int16Array;
     }
 }
 
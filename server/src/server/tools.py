@@ -7,15 +7,11 @@ root_dir = Path(__file__).resolve().parent.parent.parent.parent
 if str(root_dir) not in sys.path:
     sys.path.insert(0, str(root_dir))
 
+from functools import lru_cache
 from langchain_core.tools import tool
-from langchain_community.tools import TavilySearchResults
 from langchain.tools import Tool
-from langchain_community.tools import DuckDuckGoSearchRun
-from langchain_community.agent_toolkits.openapi.toolkit import RequestsToolkit
-from langchain_community.utilities.requests import TextRequestsWrapper
 from langchain_anthropic import ChatAnthropic
 from dotenv import load_dotenv
-from browser_agent import BrowserToolkit
 
 # from coinbase_agentkit import (
 #     AgentKit,
@@ -32,16 +28,8 @@ from browser_agent import BrowserToolkit
 # )
 # from coinbase_agentkit_langchain import get_langchain_tools
 
-from hyperbolic_langchain.agent_toolkits import HyperbolicToolkit
-from hyperbolic_langchain.utils import HyperbolicAgentkitWrapper
-from podcast_agent.podcast_knowledge_base import PodcastKnowledgeBase
-from twitter_agent.twitter_state import TwitterState
-from twitter_agent.custom_twitter_actions import (
-    create_delete_tweet_tool,
-    create_get_user_id_tool,
-    create_get_user_tweets_tool,
-    create_retweet_tool
-)
+# Toolkit modules are imported inside the TOOL_REGISTRY factories below, so
+# disabled tools never pay their import cost
 # wallet_data_file = "wallet_data.txt"
 
 # Load environment variables
@@ -73,21 +61,30 @@ load_dotenv(override=True)
 #     ]
 # ))
 
-from hyperbolic_langchain.agent_toolkits import HyperbolicToolkit
-from hyperbolic_langchain.utils import HyperbolicAgentkitWrapper
-from podcast_agent.podcast_knowledge_base import PodcastKnowledgeBase
-from twitter_agent.custom_twitter_actions import (
-    create_delete_tweet_tool,
-    create_get_user_id_tool,
-    create_get_user_tweets_tool,
-    create_retweet_tool
-)
-
-
-
-
 ALLOW_DANGEROUS_REQUEST = True
 
+# Tool feature flags (all enabled unless set to something other than "true"),
+# read once at import instead of on every create_tools call
+_FLAG_DEFAULTS = {
+    "USE_BROWSER_TOOLS": True,
+    "USE_TWEET_REPLY_TRACKING": True,
+    "USE_TWEET_REPOST_TRACKING": True,
+    "USE_TWITTER_CORE": True,
+    "USE_TWEET_DELETE": True,
+    "USE_USER_ID_LOOKUP": True,
+    "USE_USER_TWEETS_LOOKUP": True,
+    "USE_RETWEET": True,
+    "USE_TWITTER_KNOWLEDGE_BASE": True,
+    "USE_PODCAST_KNOWLEDGE_BASE": True,
+    "USE_HYPERBOLIC_TOOLS": True,
+    "USE_WEB_SEARCH": True,
+    "USE_REQUEST_TOOLS": True,
+}
+TOOL_FLAGS = {
+    name: os.getenv(name, str(default)).strip().lower() == "true"
+    for name, default in _FLAG_DEFAULTS.items()
+}
+
 # Initialize base components
 llm = ChatAnthropic(model="claude-3-sonnet-20240229")
 
@@ -104,148 +101,159 @@ config = {
     }
 }
 
-# Initialize wrappers
-hyperbolic_agentkit = HyperbolicAgentkitWrapper()
+# The podcast knowledge base loads an embedding model, so build it on first use
+_podcast_kb = None
+
+def get_podcast_knowledge_base():
+    """Return the shared podcast knowledge base, creating it on first use."""
+    global _podcast_kb
+    if _podcast_kb is None:
+        # Imported here so chromadb and sentence_transformers load only if the tool is used
+        from podcast_agent.podcast_knowledge_base import PodcastKnowledgeBase
+        _podcast_kb = PodcastKnowledgeBase()
+    return _podcast_kb
 
-podcast_kb = PodcastKnowledgeBase()
+def query_podcast_knowledge(query: str) -> str:
+    """Query the lazily-initialized podcast knowledge base."""
+    return get_podcast_knowledge_base().query_and_format(query)
 
 @tool
 def add(a: int, b: int):
     """Add two numbers. Please let the user know that you're adding the numbers BEFORE you call the tool"""
     return a + b
 
+@lru_cache(maxsize=None)
+def _twitter_state():
+    """Shared TwitterState for the reply and repost tracking tools."""
+    from twitter_agent.twitter_state import TwitterState
+    return TwitterState()
+
+def _browser_tools():
+    from browser_agent import BrowserToolkit
+    return BrowserToolkit().get_tools()
+
+def _reply_tracking_tools():
+    twitter_state = _twitter_state()
+    return [
+        Tool(
+            name="has_replied_to",
+            func=twitter_state.has_replied_to,
+            description="""Check if we have already replied to a tweet. MUST be used before replying to any tweet.
+            Input: tweet ID string.
+            Rules:
+            1. Always check this before replying to any tweet
+            2. If returns True, do NOT reply and select a different tweet
+            3. If returns False, proceed with reply_to_tweet then add_replied_to"""
+        ),
+        Tool(
+            name="add_replied_to",
+            func=twitter_state.add_replied_tweet,
+            description="""Add a tweet ID to the database of replied tweets. 
+            MUST be used after successfully replying to a tweet.
+            Input: tweet ID string.
+            Rules:
+            1. Only use after successful reply_to_tweet
+            2. Must verify with has_replied_to first
+            3. Stores tweet ID permanently to prevent duplicate replies"""
+        )
+    ]
+
+def _repost_tracking_tools():
+    twitter_state = _twitter_state()
+    return [
+        Tool(
+            name="has_reposted",
+            func=twitter_state.has_reposted,
+            description="Check if we have already reposted a tweet. Input should be a tweet ID string."
+        ),
+        Tool(
+            name="add_reposted",
+            func=twitter_state.add_reposted_tweet,
+            description="Add a tweet ID to the database of reposted tweets."
+        )
+    ]
+
+def _twitter_action_tool(factory_name):
+    """Factory for one of the custom Twitter tools in twitter_agent.custom_twitter_actions."""
+    def factory():
+        from twitter_agent import custom_twitter_actions
+        return [getattr(custom_twitter_actions, factory_name)()]
+    return factory
+
+def _hyperbolic_tools():
+    from hyperbolic_langchain.agent_toolkits import HyperbolicToolkit
+    from hyperbolic_langchain.utils import HyperbolicAgentkitWrapper
+    return HyperbolicToolkit.from_hyperbolic_agentkit_wrapper(HyperbolicAgentkitWrapper()).get_tools()
+
+def _web_search_tools():
+    from langchain_community.tools import TavilySearchResults
+    return [TavilySearchResults(
+        max_results=5,
+        include_answer=True,
+        description=(
+            "This is a search tool for accessing the internet.\n\n"
+            "Let the user know you're asking your friend Tavily for help before you call the tool."
+        ),
+    )]
+
+def _request_tools():
+    from langchain_community.agent_toolkits.openapi.toolkit import RequestsToolkit
+    from langchain_community.utilities.requests import TextRequestsWrapper
+    return RequestsToolkit(
+        requests_wrapper=TextRequestsWrapper(headers={}),
+        allow_dangerous_requests=ALLOW_DANGEROUS_REQUEST,
+    ).get_tools()
+
+# (flags that must all be enabled, factory returning the tools), in registration order.
+# Coinbase AgentKit tools are not wired up for the voice server.
+TOOL_REGISTRY = [
+    (("USE_BROWSER_TOOLS",), _browser_tools),
+    (("USE_TWEET_REPLY_TRACKING",), _reply_tracking_tools),
+    (("USE_TWEET_REPOST_TRACKING",), _repost_tracking_tools),
+    (("USE_TWITTER_CORE", "USE_TWEET_DELETE"), _twitter_action_tool("create_delete_tweet_tool")),
+    (("USE_TWITTER_CORE", "USE_USER_ID_LOOKUP"), _twitter_action_tool("create_get_user_id_tool")),
+    (("USE_TWITTER_CORE", "USE_USER_TWEETS_LOOKUP"), _twitter_action_tool("create_get_user_tweets_tool")),
+    (("USE_TWITTER_CORE", "USE_RETWEET"), _twitter_action_tool("create_retweet_tool")),
+    (("USE_HYPERBOLIC_TOOLS",), _hyperbolic_tools),
+    (("USE_WEB_SEARCH",), _web_search_tools),
+    (("USE_REQUEST_TOOLS",), _request_tools),
+]
+
 def create_tools(knowledge_base=None, podcast_knowledge_base=None):
     """Create and return a list of tools."""
-    tools = []
     # Add basic tools
-    tools.append(add)
-
-    # Add browser toolkit if enabled
-    if os.getenv("USE_BROWSER_TOOLS", "true").lower() == "true":
-        browser_toolkit = BrowserToolkit()
-        tools.extend(browser_toolkit.get_tools())
-    
-    # Add Twitter State Management Tools if enabled
-    if os.getenv("USE_TWEET_REPLY_TRACKING", "true").lower() == "true":
-        twitter_state = TwitterState()
-        tools.extend([
-            Tool(
-                name="has_replied_to",
-                func=twitter_state.has_replied_to,
-                description="""Check if we have already replied to a tweet. MUST be used before replying to any tweet.
-                Input: tweet ID string.
-                Rules:
-                1. Always check this before replying to any tweet
-                2. If returns True, do NOT reply and select a different tweet
-                3. If returns False, proceed with reply_to_tweet then add_replied_to"""
-            ),
-            Tool(
-                name="add_replied_to",
-                func=twitter_state.add_replied_tweet,
-                description="""Add a tweet ID to the database of replied tweets. 
-                MUST be used after successfully replying to a tweet.
-                Input: tweet ID string.
-                Rules:
-                1. Only use after successful reply_to_tweet
-                2. Must verify with has_replied_to first
-                3. Stores tweet ID permanently to prevent duplicate replies"""
-            )
-        ])
-
-    if os.getenv("USE_TWEET_REPOST_TRACKING", "true").lower() == "true":
-        if not 'twitter_state' in locals():
-            twitter_state = TwitterState()
-        tools.extend([
-            Tool(
-                name="has_reposted",
-                func=twitter_state.has_reposted,
-                description="Check if we have already reposted a tweet. Input should be a tweet ID string."
-            ),
-            Tool(
-                name="add_reposted",
-                func=twitter_state.add_reposted_tweet,
-                description="Add a tweet ID to the database of reposted tweets."
-            )
-        ])
-
-    # Add Custom Twitter Tools if enabled
-    if os.getenv("USE_TWITTER_CORE", "true").lower() == "true":
-        if os.getenv("USE_TWEET_DELETE", "true").lower() == "true":
-            tools.append(create_delete_tweet_tool())
-            
-        if os.getenv("USE_USER_ID_LOOKUP", "true").lower() == "true":
-            tools.append(create_get_user_id_tool())
-            
-        if os.getenv("USE_USER_TWEETS_LOOKUP", "true").lower() == "true":
-            tools.append(create_get_user_tweets_tool())
-            
-        if os.getenv("USE_RETWEET", "true").lower() == "true":
-            tools.append(create_retweet_tool())
+    tools = [add]
+
+    for flags, factory in TOOL_REGISTRY:
+        if all(TOOL_FLAGS[flag] for flag in flags):
+            tools.extend(factory())
 
     # Add Twitter Knowledge Base Tool if enabled
-    if os.getenv("USE_TWITTER_KNOWLEDGE_BASE", "true").lower() == "true" and knowledge_base:
+    if TOOL_FLAGS["USE_TWITTER_KNOWLEDGE_BASE"] and knowledge_base:
         tools.append(Tool(
             name="query_twitter_knowledge_base",
-            func=lambda query: knowledge_base.format_query_results(
-                knowledge_base.query_knowledge_base(query)
-            ),
+            func=knowledge_base.query_and_format,
             description="""Query the Twitter knowledge base for relevant tweets about crypto/AI/tech trends.
             Input should be a search query string.
             Example: query_twitter_knowledge_base("latest developments in AI")"""
         ))
 
-    # Add Podcast Knowledge Base Tools if enabled
-    if os.getenv("USE_PODCAST_KNOWLEDGE_BASE", "true").lower() == "true" and podcast_knowledge_base:
+    # Add Podcast Knowledge Base Tools if enabled. Fall back to the shared,
+    # lazily-built podcast knowledge base when none was passed in
+    if TOOL_FLAGS["USE_PODCAST_KNOWLEDGE_BASE"] and podcast_knowledge_base:
         tools.append(Tool(
             name="query_podcast_knowledge_base",
-            func=lambda query: podcast_knowledge_base.format_query_results(
-                podcast_knowledge_base.query_knowledge_base(query)
-            ),
+            func=podcast_knowledge_base.query_and_format,
             description="Query the podcast knowledge base for relevant podcast segments about crypto/Web3/gaming. Input should be a search query string."
         ))
-
-    # Add Coinbase AgentKit tools if enabled
-    # if os.getenv("USE_COINBASE_TOOLS", "true").lower() == "true":
-    #     coinbase_tools = get_langchain_tools(agentkit)
-    #     tools.extend(coinbase_tools)
-
-    # Add Hyperbolic tools if enabled
-    if os.getenv("USE_HYPERBOLIC_TOOLS", "true").lower() == "true":
-        hyperbolic_toolkit = HyperbolicToolkit.from_hyperbolic_agentkit_wrapper(hyperbolic_agentkit)
-        tools.extend(hyperbolic_toolkit.get_tools())
-
-    # Add web search tools if enabled
-    if os.getenv("USE_WEB_SEARCH", "true").lower() == "true":
-        tools.append(tavily_tool)
-
-    # Add requests toolkit if enabled
-    if os.getenv("USE_REQUEST_TOOLS", "true").lower() == "true":
-        toolkit = RequestsToolkit(
-            requests_wrapper=TextRequestsWrapper(headers={}),
-            allow_dangerous_requests=ALLOW_DANGEROUS_REQUEST,
-        )
-        tools.extend(toolkit.get_tools())
-
-    # Add podcast query tool if enabled
-    if os.getenv("USE_PODCAST_KNOWLEDGE_BASE", "true").lower() == "true":
-        podcast_query_tool = Tool(
+    elif TOOL_FLAGS["USE_PODCAST_KNOWLEDGE_BASE"]:
+        tools.append(Tool(
             name="query_podcast_knowledge",
             description="Query the podcast knowledge base for relevant information about crypto, gaming, and Web3 topics",
-            func=lambda query: podcast_kb.format_query_results(podcast_kb.query_knowledge_base(query))
-        )
-        tools.append(podcast_query_tool)
+            func=query_podcast_knowledge
+        ))
 
     return tools
 
-tavily_tool = TavilySearchResults(
-    max_results=5,
-    include_answer=True,
-    description=(
-        "This is a search tool for accessing the internet.\n\n"
-        "Let the user know you're asking your friend Tavily for help before you call the tool."
-    ),
-
-)
-
 # Initialize all tools with default wrappers
-TOOLS = create_tools(knowledge_base=None, podcast_knowledge_base=podcast_kb)
+TOOLS = create_tools(knowledge_base=None)
@@ -1,13 +1,10 @@
-from collections.abc import Callable
-from json import dumps
-from pydantic import BaseModel, Field
+from pydantic import BaseModel
 from langchain.tools import Tool
-from typing import Optional, List, Dict, Union
+from typing import Optional, List
 import tweepy
 import os
 from dotenv import load_dotenv
 import asyncio
-from functools import partial
 
 # Load environment variables
 load_dotenv()
@@ -20,7 +17,11 @@ class Tweet(BaseModel):
 
 class TwitterClient:
     def __init__(self):
-        """Initialize Twitter API v2 client with credentials from environment variables."""
+        """Initialize Twitter API v2 client with credentials from environment variables.
+        
+        tweepy is synchronous, so the async methods below run its calls in a worker
+        thread; this keeps the event loop free and lets several requests overlap.
+        """
         self.client = tweepy.Client(
             bearer_token=os.getenv("TWITTER_BEARER_TOKEN"),
             consumer_key=os.getenv("TWITTER_API_KEY"),
@@ -29,13 +30,19 @@ class TwitterClient:
             access_token_secret=os.getenv("TWITTER_ACCESS_TOKEN_SECRET"),
             wait_on_rate_limit=True
         )
+        # Resolved user IDs by lowercased username (handles are case-insensitive)
+        self._user_ids = {}
 
     async def get_user_id(self, username: str) -> Optional[str]:
-        """Get user ID from username."""
+        """Get user ID from username, reusing earlier lookups."""
+        key = username.lower()
+        if key in self._user_ids:
+            return self._user_ids[key]
         try:
-            user = self.client.get_user(username=username)
+            user = await asyncio.to_thread(self.client.get_user, username=username)
             if user and user.data:
-                return str(user.data.id)
+                self._user_ids[key] = str(user.data.id)
+                return self._user_ids[key]
             return None
         except Exception as e:
             print(f"Error getting user ID for {username}: {str(e)}")
@@ -44,7 +51,8 @@ class TwitterClient:
     async def get_user_tweets(self, user_id: str, max_results: int = 10) -> List[Tweet]:
         """Get recent tweets from a user."""
         try:
-            tweets = self.client.get_users_tweets(
+            tweets = await asyncio.to_thread(
+                self.client.get_users_tweets,
                 id=user_id,
                 max_results=max_results,
                 tweet_fields=['created_at', 'author_id']
@@ -66,10 +74,46 @@ class TwitterClient:
             print(f"Error getting tweets for user {user_id}: {str(e)}")
             return []
 
+    async def get_mentions(self, user_id: str, since_id: Optional[str] = None, max_results: int = 50) -> List[Tweet]:
+        """Get tweets mentioning a user, optionally only those newer than since_id.
+
+        With since_id, every page newer than it is fetched (max_results per page),
+        so a busy interval can't push older mentions past the caller's cursor. An
+        error on any page returns nothing rather than a partial result with a gap.
+        Without since_id only the newest page is fetched.
+        """
+        try:
+            tweets = []
+            pagination_token = None
+            while True:
+                mentions = await asyncio.to_thread(
+                    self.client.get_users_mentions,
+                    id=user_id,
+                    since_id=since_id,
+                    max_results=max_results,
+                    pagination_token=pagination_token,
+                    tweet_fields=['created_at', 'author_id']
+                )
+                tweets.extend(
+                    Tweet(
+                        id=str(tweet.id),
+                        text=tweet.text,
+                        author_id=str(tweet.author_id),
+                        created_at=tweet.created_at.isoformat()
+                    )
+                    for tweet in mentions.data or []
+                )
+                pagination_token = (mentions.meta or {}).get("next_token")
+                if since_id is None or not pagination_token:
+                    return tweets
+        except Exception as e:
+            print(f"Error getting mentions for user {user_id}: {str(e)}")
+            return []
+
     async def delete_tweet(self, tweet_id: str) -> bool:
         """Delete a tweet."""
         try:
-            response = self.client.delete_tweet(id=tweet_id)
+            response = await asyncio.to_thread(self.client.delete_tweet, id=tweet_id)
             return response.data is not None
         except Exception as e:
             print(f"Error deleting tweet {tweet_id}: {str(e)}")
@@ -78,13 +122,15 @@ class TwitterClient:
     async def retweet(self, tweet_id: str) -> bool:
         """Retweet a tweet."""
         try:
-            response = self.client.retweet(tweet_id=tweet_id)
+            response = await asyncio.to_thread(self.client.retweet, tweet_id=tweet_id)
             return response.data is not None
         except Exception as e:
             print(f"Error retweeting {tweet_id}: {str(e)}")
             return False
 
 # Create a single instance of TwitterClient
+# Tools expose its methods as coroutines so the agent's async tool node can await
+# several Twitter calls from one turn concurrently instead of nesting event loops.
 twitter_client = TwitterClient()
 
 def create_delete_tweet_tool() -> Tool:
@@ -94,7 +140,8 @@ def create_delete_tweet_tool() -> Tool:
         description="""Delete a tweet using its ID. You can only delete tweets from your own account.
         Input should be the tweet ID as a string.
         Example: delete_tweet("1234567890")""",
-        func=lambda tweet_id: asyncio.run(twitter_client.delete_tweet(tweet_id))
+        func=lambda tweet_id: asyncio.run(twitter_client.delete_tweet(tweet_id)),
+        coroutine=twitter_client.delete_tweet
     )
 
 def create_get_user_id_tool() -> Tool:
@@ -104,7 +151,8 @@ def create_get_user_id_tool() -> Tool:
         description="""Get a Twitter user's ID from their username.
         Input should be the username as a string (without the @ symbol).
         Example: get_user_id("TwitterDev")""",
-        func=lambda username: asyncio.run(twitter_client.get_user_id(username))
+        func=lambda username: asyncio.run(twitter_client.get_user_id(username)),
+        coroutine=twitter_client.get_user_id
     )
 
 def create_get_user_tweets_tool() -> Tool:
@@ -115,7 +163,8 @@ def create_get_user_tweets_tool() -> Tool:
         Input should be the user ID as a string.
         Example: get_user_tweets("783214")
         Optionally specify max_results (default 10) as: get_user_tweets("783214", max_results=5)""",
-        func=lambda user_id, max_results=10: asyncio.run(twitter_client.get_user_tweets(user_id, max_results))
+        func=lambda user_id, max_results=10: asyncio.run(twitter_client.get_user_tweets(user_id, max_results)),
+        coroutine=twitter_client.get_user_tweets
     )
 
 def create_retweet_tool() -> Tool:
@@ -125,7 +174,8 @@ def create_retweet_tool() -> Tool:
         description="""Retweet a tweet using its ID. You can only retweet public tweets.
         Input should be the tweet ID as a string.
         Example: retweet("1234567890")""",
-        func=lambda tweet_id: asyncio.run(twitter_client.retweet(tweet_id))
+        func=lambda tweet_id: asyncio.run(twitter_client.retweet(tweet_id)),
+        coroutine=twitter_client.retweet
     )
 
 def create_query_knowledge_base_tool(knowledge_base) -> Tool:
@@ -135,7 +185,7 @@ def create_query_knowledge_base_tool(knowledge_base) -> Tool:
         description="""Query the knowledge base for relevant information about current trends.
         Input should be a query string describing the information you're looking for.
         Example: query_knowledge_base("latest developments in AI")""",
-        func=lambda query: knowledge_base.query_knowledge_base(query)
+        func=knowledge_base.query_knowledge_base
     )
 
 
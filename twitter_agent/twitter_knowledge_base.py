@@ -1,11 +1,8 @@
 from typing import List, Dict
-import chromadb
-from chromadb.utils import embedding_functions
 from datetime import datetime
 from pydantic import BaseModel
-from sentence_transformers import SentenceTransformer
-import numpy as np
 from base_utils.utils import print_system, print_error
+from base_utils.embeddings import CachedEmbeddingFunction, EMBEDDING_CACHE_KEY, COLLECTION_METADATA, get_chroma_client, load_embedding_model
 import asyncio
 import os
 import random
@@ -27,27 +24,20 @@ class TweetKnowledgeBase:
         os.makedirs(data_dir, exist_ok=True)
         
         # Initialize ChromaDB client with persistence in data directory
-        self.client = chromadb.PersistentClient(path="./chroma_db")
+        self.client = get_chroma_client()
         
         # Use a more advanced embedding model
-        self.embedding_model = SentenceTransformer('all-mpnet-base-v2')
+        self.embedding_model = load_embedding_model()
         
-        # Create embedding function that matches ChromaDB's expected interface
-        class EmbeddingFunction:
-            def __init__(self, model):
-                self.model = model
-            
-            def __call__(self, input: List[str]) -> List[List[float]]:
-                embeddings = self.model.encode(input)
-                return embeddings.tolist()
-        
-        embedding_func = EmbeddingFunction(self.embedding_model)
+        # Reuse cached vectors for text that has already been embedded
+        embedding_func = CachedEmbeddingFunction(self.embedding_model, EMBEDDING_CACHE_KEY)
         
         # Create or get collection
         try:
             self.collection = self.client.get_or_create_collection(
                 name=collection_name,
-                embedding_function=embedding_func
+                embedding_function=embedding_func,
+                metadata=COLLECTION_METADATA
             )
         except Exception as e:
             print(f"Error initializing collection: {e}")
@@ -107,8 +97,7 @@ class TweetKnowledgeBase:
                     "relevance_score": 1 - distance  # Convert distance to similarity score
                 })
             
-            # Sort by relevance score
-            formatted_results.sort(key=lambda x: x['relevance_score'], reverse=True)
+            # Chroma already returns results nearest-first, i.e. by descending relevance
             
             print_system(f"Found {len(formatted_results)} relevant tweets")
             return formatted_results
@@ -117,6 +106,10 @@ class TweetKnowledgeBase:
             print_error(f"Error querying knowledge base: {e}")
             return []
 
+    def query_and_format(self, query: str) -> str:
+        """Query the knowledge base and return the formatted results (for agent tools)."""
+        return self.format_query_results(self.query_knowledge_base(query))
+
     def format_query_results(self, results: List[Dict]) -> str:
         """Format query results into a readable string."""
         if not results:
@@ -136,7 +129,7 @@ class TweetKnowledgeBase:
         """Get statistics about the knowledge base collection."""
         try:
             count = self.collection.count()
-            metadata = self.collection.get()
+            metadata = self.collection.get(include=["metadatas"])
             last_update = None
             if metadata.get("metadatas"):
                 # Get most recent tweet timestamp
@@ -156,7 +149,7 @@ class TweetKnowledgeBase:
         """Clear all tweets from the knowledge base."""
         try:
             print_system("Clearing knowledge base collection...")
-            ids = self.collection.get()["ids"]
+            ids = self.collection.get(include=[])["ids"]
             if ids:  # Only attempt to delete if there are IDs
                 self.collection.delete(ids=ids)
                 print_system("Knowledge base cleared successfully")
@@ -171,7 +164,6 @@ async def update_knowledge_base(twitter_client: TwitterClient, knowledge_base, k
     """Update the knowledge base with recent tweets from top KOLs."""
     TOP_KOLS = 5
     TWEETS_PER_KOL = 15
-    REQUEST_DELAY = 5
     
     print_system("\n=== Starting Knowledge Base Update ===")
     print_system("Function parameter details:")
@@ -275,7 +267,7 @@ async def update_knowledge_base(twitter_client: TwitterClient, knowledge_base, k
     print_system(f"\n=== Found {len(valid_kols)} valid KOLs ===")
     
     update_time = datetime.now()
-    all_tweets = []
+    added = 0
     
     # Select random sample of KOLs
     try:
@@ -298,43 +290,34 @@ async def update_knowledge_base(twitter_client: TwitterClient, knowledge_base, k
         print_error(f"Error clearing knowledge base: {e}")
         return
     
-    # Process each selected KOL
+    # Fetch every selected KOL's tweets concurrently and embed each KOL's batch
+    # as soon as it arrives, so embedding overlaps the remaining fetches
     print_system("\n=== Processing selected KOLs ===")
-    for i, kol in enumerate(selected_kols, 1):
+    
+    async def fetch_kol_tweets(kol: Dict):
         try:
-            print_system(f"\nProcessing KOL {i}/{len(selected_kols)}: {kol['username']}")
-            kol_tweets = []
-            
             print_system(f"Getting tweets for user {kol['username']} (ID: {kol['user_id']})")
-            tweets = await twitter_client.get_user_tweets(
+            return kol, await twitter_client.get_user_tweets(
                 user_id=kol['user_id'],
                 max_results=TWEETS_PER_KOL
             )
-            
-            if not tweets:
-                print_system(f"No tweets found for {kol['username']}")
-                continue
-                
-            print_system(f"Found {len(tweets)} tweets")
-            kol_tweets.extend(tweets)
-            
-            if kol_tweets:
-                print_system(f"Adding {len(kol_tweets)} tweets to knowledge base")
-                knowledge_base.add_tweets(kol_tweets)
-            
-            print_system(f"Waiting {REQUEST_DELAY} seconds before next API call...")
-            await asyncio.sleep(REQUEST_DELAY)
-            
         except Exception as e:
             print_error(f"Error processing KOL {kol['username']}: {str(e)}")
-            continue
+            return kol, []
     
-    if all_tweets:
-        print_system(f"\n=== Adding {len(all_tweets)} tweets to knowledge base ===")
+    for fetch in asyncio.as_completed([fetch_kol_tweets(kol) for kol in selected_kols]):
+        kol, tweets = await fetch
+        if not tweets:
+            print_system(f"No tweets found for {kol['username']}")
+            continue
+        print_system(f"Found {len(tweets)} tweets for {kol['username']}, adding to knowledge base")
         try:
-            knowledge_base.add_tweets(all_tweets)
-            print_system(f"Knowledge base updated successfully at {update_time.strftime('%Y-%m-%d %H:%M:%S UTC')}")
+            await asyncio.to_thread(knowledge_base.add_tweets, tweets)
+            added += len(tweets)
         except Exception as e:
             print_error(f"Error updating knowledge base: {e}")
+    
+    if added:
+        print_system(f"Knowledge base updated successfully with {added} tweets at {update_time.strftime('%Y-%m-%d %H:%M:%S UTC')}")
     else:
         print_system("\n=== No tweets to add to knowledge base ===") 
\ No newline at end of file
@@ -1,21 +1,43 @@
 import sqlite3
 import os
+import asyncio
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-import json
 
 # Constants
 MENTION_CHECK_INTERVAL = 2 * 60  
 MAX_MENTIONS_PER_INTERVAL = 50  # Adjust based on your API tier limits
+MAX_MENTION_CHECK_BACKOFF = 4  # Checks run this much more often than MENTION_CHECK_INTERVAL while mentions are active
+
+# Quiet polls after which next_check_interval reaches MENTION_CHECK_INTERVAL
+_MAX_EMPTY_MENTION_STREAK = (MAX_MENTION_CHECK_BACKOFF - 1).bit_length()
 
 class TwitterState:
     def __init__(self):
         self.account_id = None
         self.last_mention_id = None
-        self.last_check_time = None
         self.mentions_count = 0
         self.reset_time = None
+        self.empty_mention_streak = 0
+        # In-memory copies of replied_tweets / reposted_tweets, loaded on first use so that negative
+        # lookups (the common case) don't need a database round trip
+        self._replied_ids = None
+        self._reposted_ids = None
+        # Last state written to (or read from) the database, to skip no-op saves
+        self._saved_state = {}
+        # Lets wake() cut short the automation loop's wait between mention checks.
+        # Until the loop first waits, a wake is recorded as pending instead
+        self._wake_event = asyncio.Event()
+        self._wake_loop = None
+        self._wake_pending = False
+        self._wake_lock = threading.Lock()
         # Get character name from env and create DB name
         self.db_name = self._get_db_name()
+        # One connection for the lifetime of the state object. Saves and inserts
+        # also run in worker threads (asyncio.to_thread), so access is serialized
+        self._conn = sqlite3.connect(self.db_name, check_same_thread=False)
+        self._db_lock = threading.Lock()
         self._init_db()
         
     def _get_db_name(self):
@@ -31,9 +53,20 @@ class TwitterState:
         except Exception:
             return 'twitter_state.db'  # fallback to default
 
+    @contextmanager
+    def _transaction(self):
+        """Use the shared connection, committing on success and rolling back on error."""
+        with self._db_lock, self._conn:
+            yield self._conn
+
+    def close(self):
+        """Close the database connection."""
+        with self._db_lock:
+            self._conn.close()
+
     def _init_db(self):
         """Initialize SQLite database for state and replied tweets."""
-        with sqlite3.connect(self.db_name) as conn:
+        with self._transaction() as conn:
             # Create replied tweets table
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS replied_tweets (
@@ -63,61 +96,114 @@ class TwitterState:
     
     def load(self):
         """Load state from SQLite database."""
-        with sqlite3.connect(self.db_name) as conn:
+        with self._transaction() as conn:
             cursor = conn.execute('SELECT key, value FROM twitter_state')
             for key, value in cursor.fetchall():
                 if key == 'last_mention_id':
                     self.last_mention_id = value
-                elif key == 'last_check_time':
-                    self.last_check_time = datetime.fromisoformat(value) if value else None
                 elif key == 'reset_time':
                     self.reset_time = datetime.fromisoformat(value) if value else None
                 elif key == 'mentions_count':
                     self.mentions_count = int(value)
+        self._saved_state = self._state_data()
+
+    def _state_data(self):
+        """Serialize the persisted state fields to their database representation."""
+        return {
+            'last_mention_id': self.last_mention_id,
+            'mentions_count': str(self.mentions_count),
+            'reset_time': self.reset_time.isoformat() if self.reset_time else None
+        }
 
     def save(self):
-        """Save state to SQLite database."""
-        with sqlite3.connect(self.db_name) as conn:
-            state_data = {
-                'last_mention_id': self.last_mention_id,
-                'last_check_time': self.last_check_time.isoformat() if self.last_check_time else None,
-                'mentions_count': str(self.mentions_count),
-                'reset_time': self.reset_time.isoformat() if self.reset_time else None
-            }
-            
-            for key, value in state_data.items():
-                conn.execute('''
-                    INSERT OR REPLACE INTO twitter_state (key, value) 
-                    VALUES (?, ?)
-                ''', (key, value))
-            conn.commit()
-  
+        """Save state to SQLite database, writing only the keys that changed."""
+        state_data = self._state_data()
+        changed = [
+            (key, value) for key, value in state_data.items()
+            if key not in self._saved_state or self._saved_state[key] != value
+        ]
+        if not changed:
+            return
+
+        with self._transaction() as conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO twitter_state (key, value) 
+                VALUES (?, ?)
+            ''', changed)
+        self._saved_state = state_data
+
+    async def save_async(self):
+        """Save state from async code without blocking the event loop on SQLite I/O."""
+        await asyncio.to_thread(self.save)
+
+    def _get_replied_ids(self):
+        """Return the set of replied tweet IDs, reading the table once on first use."""
+        if self._replied_ids is None:
+            with self._transaction() as conn:
+                cursor = conn.execute('SELECT tweet_id FROM replied_tweets')
+                self._replied_ids = {str(row[0]) for row in cursor.fetchall()}
+        return self._replied_ids
 
     def add_replied_tweet(self, tweet_id):
         """Add a tweet ID to the database of replied tweets."""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self._transaction() as conn:
                 conn.execute('INSERT OR REPLACE INTO replied_tweets (tweet_id) VALUES (?)', (tweet_id,))
-                conn.commit()
+            self._get_replied_ids().add(str(tweet_id))
             return f"Successfully added tweet {tweet_id} to replied tweets database"
         except Exception as e:
             return f"Error adding tweet {tweet_id} to database: {str(e)}"
 
     def has_replied_to(self, tweet_id):
         """Check if we've already replied to this tweet."""
-        with sqlite3.connect(self.db_name) as conn:
-            cursor = conn.execute('SELECT 1 FROM replied_tweets WHERE tweet_id = ?', (tweet_id,))
-            return cursor.fetchone() is not None
-
-    def can_check_mentions(self):
-        """Check if enough time has passed since last mention check."""
-        if not self.last_check_time:
-     
-            return True
-        
-        time_since_last_check = (datetime.now() - self.last_check_time).total_seconds()
-      
-        return time_since_last_check >= MENTION_CHECK_INTERVAL
+        return str(tweet_id) in self._get_replied_ids()
+
+    def has_replied_to_bulk(self, tweet_ids):
+        """Return the subset of tweet_ids we've already replied to."""
+        replied_ids = self._get_replied_ids()
+        return {tweet_id for tweet_id in tweet_ids if str(tweet_id) in replied_ids}
+
+    def record_mention_poll(self, new_mention_count):
+        """Track consecutive polls that found no new mentions, up to the full backoff."""
+        if new_mention_count:
+            self.empty_mention_streak = 0
+        else:
+            self.empty_mention_streak = min(self.empty_mention_streak + 1, _MAX_EMPTY_MENTION_STREAK)
+
+    def next_check_interval(self):
+        """Seconds until the next mention check.
+
+        Checks start at MENTION_CHECK_INTERVAL / MAX_MENTION_CHECK_BACKOFF after a
+        poll that found mentions and double after each quiet poll, never going
+        past MENTION_CHECK_INTERVAL.
+        """
+        return min(MENTION_CHECK_INTERVAL, MENTION_CHECK_INTERVAL * 2 ** self.empty_mention_streak / MAX_MENTION_CHECK_BACKOFF)
+
+    async def wait_for_wake(self, timeout):
+        """Wait up to timeout seconds. Returns True if wake() was called meanwhile.
+
+        A wake that arrived since the last wait, including before the first one,
+        returns True immediately.
+        """
+        with self._wake_lock:
+            self._wake_loop = asyncio.get_running_loop()
+            if self._wake_pending:
+                self._wake_pending = False
+                return True
+        try:
+            await asyncio.wait_for(self._wake_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._wake_event.clear()
+        return True
+
+    def wake(self):
+        """Trigger the next mention check now. Safe to call from any thread."""
+        with self._wake_lock:
+            if self._wake_loop is None:
+                self._wake_pending = True
+            else:
+                self._wake_loop.call_soon_threadsafe(self._wake_event.set)
 
     def update_rate_limit(self):
         """Update and check rate limits."""
@@ -129,23 +215,27 @@ class TwitterState:
         self.mentions_count += 1
         return self.mentions_count <= MAX_MENTIONS_PER_INTERVAL 
 
+    def _get_reposted_ids(self):
+        """Return the set of reposted tweet IDs, reading the table once on first use."""
+        if self._reposted_ids is None:
+            with self._transaction() as conn:
+                cursor = conn.execute('SELECT tweet_id FROM reposted_tweets')
+                self._reposted_ids = {str(row[0]) for row in cursor.fetchall()}
+        return self._reposted_ids
+
     def add_reposted_tweet(self, tweet_id: str) -> str:
         """Add a tweet ID to the database of reposted tweets."""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self._transaction() as conn:
                 conn.execute(
                     'INSERT INTO reposted_tweets (tweet_id) VALUES (?)',
                     (tweet_id,)
                 )
+            self._get_reposted_ids().add(str(tweet_id))
             return f"Successfully recorded repost of tweet {tweet_id}"
         except sqlite3.IntegrityError:
             return f"Tweet {tweet_id} was already recorded as reposted"
 
     def has_reposted(self, tweet_id: str) -> bool:
         """Check if we have already reposted a tweet."""
-        with sqlite3.connect(self.db_name) as conn:
-            cursor = conn.execute(
-                'SELECT 1 FROM reposted_tweets WHERE tweet_id = ?',
-                (tweet_id,)
-            )
-            return cursor.fetchone() is not None 
\ No newline at end of file
+        return str(tweet_id) in self._get_reposted_ids()
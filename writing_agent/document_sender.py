@@ -46,7 +46,7 @@ class DocumentSender:
         """
         self.logger.info(f"Starting PDF text extraction from: {pdf_path}")
         try:
-            text = ""
+            page_texts = []
             with open(pdf_path, 'rb') as file:
                 reader = pypdf.PdfReader(file)
                 self.logger.info(f"PDF has {len(reader.pages)} pages")
@@ -59,8 +59,10 @@ class DocumentSender:
                     page_text = ' '.join(page_text.split())
                     # Add back paragraph breaks
                     page_text = page_text.replace(". ", ".\n\n")
-                    text += page_text + "\n\n"
+                    page_texts.append(page_text + "\n\n")
             
+            # Join once instead of growing a string page by page
+            text = "".join(page_texts)
             if text:
                 self.logger.info(f"Successfully extracted {len(text)} characters from PDF")
             else:
@@ -272,10 +274,11 @@ class DocumentSender:
             )
             
             # Combine all text blocks in the response
-            response_text = ""
-            for content_block in message.content:
-                if content_block.type == "text":
-                    response_text += content_block.text
+            response_text = "".join(
+                content_block.text
+                for content_block in message.content
+                if content_block.type == "text"
+            )
             
             self.logger.info(f"Received response from Claude ({len(response_text)} characters)")
             